@@ -59,6 +59,10 @@ export interface TTSScheduleRequest {
   startedAt: number
 }
 
+export interface TTSPrefetchRequest {
+  lines: LyricLine[]
+}
+
 // ============ Browser Service ============
 
 export interface BrowserNavigateRequest {
@@ -4,7 +4,8 @@
  * This script:
  * 1. Reads lyrics from the browser (already loaded)
  * 2. Clicks Start on the karaoke page
- * 3. Schedules TTS to speak each line ~800ms before it appears
+ * 3. Schedules TTS to speak each line ~800ms before it appears, asking the
+ *    server to time-stretch it to fit before the next line (target_ms)
  */
 
 const TTS_HTTP = 'http://localhost:3030'
@@ -34,7 +35,9 @@ const startedAt = Date.now()
 console.log(`[TTS] Started at ${startedAt}`)
 
 // Schedule TTS for each line
-for (const line of data.lyrics) {
+for (const [i, line] of data.lyrics.entries()) {
+  const next = data.lyrics[i + 1]
+  const windowMs = (next ? next.startMs : line.endMs) - line.startMs
   const speakAt = line.startMs - LEAD_TIME_MS
   const delay = speakAt - (Date.now() - startedAt)
 
@@ -45,7 +48,7 @@ for (const line of data.lyrics) {
         await fetch(`${TTS_HTTP}/speak`, {
           method: 'POST',
           headers: { 'Content-Type': 'application/json' },
-          body: JSON.stringify({ text: line.text }),
+          body: JSON.stringify({ text: line.text, target_ms: windowMs > 0 ? windowMs : undefined }),
         })
       } catch (err) {
         console.error(`[TTS] Error speaking line ${line.index}:`, err)
@@ -33,6 +33,14 @@ export const ttsClient = {
     })
   },
 
+  /** Render upcoming lines ahead of time while the TTS server is idle (vibevoice engine only). */
+  async prefetch(lines: LyricLine[]): Promise<{ ok: boolean; queued?: number; error?: string }> {
+    return request('/prefetch', {
+      method: 'POST',
+      body: JSON.stringify({ lines }),
+    })
+  },
+
   async stop(): Promise<void> {
     await request('/stop', { method: 'POST' })
   },
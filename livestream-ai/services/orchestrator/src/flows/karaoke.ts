@@ -5,7 +5,7 @@
  * 1. Launches browser
  * 2. Navigates to karaoke page
  * 3. Checks/injects session
- * 4. Reads lyrics
+ * 4. Reads lyrics (and prefetches TTS for the opening lines)
  * 5. Starts karaoke + schedules TTS
  * 6. Waits for completion
  *
@@ -17,6 +17,7 @@ import { ttsClient } from '../clients/tts'
 
 const APP_URL = process.env.APP_URL || 'http://localhost:5173'
 const DEFAULT_SONG = '/#/queen/bohemian-rhapsody/karaoke'
+const PREFETCH_LINES = 8 // opening lines rendered while the song is being started
 
 // Session data (export once after manual login, then paste here)
 const SAVED_SESSION: Record<string, string> = {}
@@ -94,6 +95,12 @@ async function runKaraokeFlow(songPath: string) {
   } else {
     console.log(`    Found ${lyricsData.lyrics.length} lines`)
     console.log(`    "${lyricsData.title}" by ${lyricsData.artist}`)
+
+    // Render the opening lines while we get the song started; a plain cache hit once scheduled
+    ttsClient.prefetch(lyricsData.lyrics.slice(0, PREFETCH_LINES))
+      .then(({ ok, queued, error }) =>
+        console.log(ok ? `    Prefetching ${queued} lines` : `    TTS prefetch unavailable: ${error}`))
+      .catch(err => console.log(`    TTS prefetch failed: ${err}`))
   }
 
   // Step 7: Check if we can start
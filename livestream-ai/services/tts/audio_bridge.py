@@ -0,0 +1,140 @@
+"""
+Thread-to-event-loop audio bridge.
+
+Generation runs on worker threads while WebSocket fan-out runs on the asyncio
+event loop. Instead of scheduling one coroutine per model chunk, generation
+threads push fixed-duration frames into a bounded queue that a single asyncio
+task drains in order.
+"""
+
+import asyncio
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Deque, List, Optional
+
+import numpy as np
+
+from profiling import NULL_TRACE
+
+
+@dataclass
+class AudioFrame:
+    """A PCM16 frame ready for fan-out."""
+
+    pcm: bytes
+    is_final: bool = False
+    trace: Any = NULL_TRACE
+    request_id: Optional[str] = None
+    seq: int = 0
+    room: Optional[str] = None  # broadcast channel; None means the default one
+    stream: Optional[int] = None  # utterance this frame belongs to, for per-utterance state
+
+
+class FrameCoalescer:
+    """Regroups variable-sized float32 chunks into fixed-size frames."""
+
+    def __init__(self, frame_samples: int):
+        if frame_samples <= 0:
+            raise ValueError("frame_samples must be positive")
+        self.frame_samples = frame_samples
+        self._pending = np.zeros(0, dtype=np.float32)
+
+    def push(self, chunk: np.ndarray) -> List[np.ndarray]:
+        """Add a chunk and return every complete frame it produced."""
+        if self._pending.size:
+            data = np.concatenate((self._pending, chunk.astype(np.float32, copy=False)))
+        else:
+            data = chunk.astype(np.float32, copy=False)
+
+        n_frames = data.size // self.frame_samples
+        cut = n_frames * self.frame_samples
+        self._pending = data[cut:].copy()
+        if n_frames == 0:
+            return []
+        return list(data[:cut].reshape(n_frames, self.frame_samples))
+
+    def flush(self) -> Optional[np.ndarray]:
+        """Return the trailing partial frame, if any."""
+        if not self._pending.size:
+            return None
+        tail, self._pending = self._pending, np.zeros(0, dtype=np.float32)
+        return tail
+
+
+class AudioBridge:
+    """Bounded single-consumer queue between generation threads and the event loop.
+
+    Producers call ``put`` from any thread; it blocks while the queue is full.
+    The consumer task only gets woken when it is idle, so a burst of frames
+    costs one event-loop wakeup instead of one per frame.
+    """
+
+    def __init__(
+        self,
+        sink: Callable[[AudioFrame], Awaitable[None]],
+        maxsize: int = 256,
+    ):
+        self._sink = sink
+        self._maxsize = maxsize
+        self._items: Deque[AudioFrame] = deque()
+        self._cond = threading.Condition()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._idle = False
+        self._task: Optional[asyncio.Task] = None
+        self.frames_delivered = 0
+        self.wakeups = 0
+
+    def start(self) -> None:
+        """Start the drain task on the running event loop."""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._task = self._loop.create_task(self._drain())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def put(self, frame: AudioFrame) -> None:
+        """Enqueue a frame from a generation thread."""
+        with self._cond:
+            while len(self._items) >= self._maxsize:
+                self._cond.wait()
+            self._items.append(frame)
+            wake = self._idle
+            self._idle = False
+        if wake and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def qsize(self) -> int:
+        return len(self._items)
+
+    def _take_all(self) -> List[AudioFrame]:
+        with self._cond:
+            batch = list(self._items)
+            self._items.clear()
+            if not batch:
+                self._idle = True
+            self._cond.notify_all()
+        return batch
+
+    async def _drain(self) -> None:
+        while True:
+            batch = self._take_all()
+            if not batch:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                self.wakeups += 1
+                continue
+            for frame in batch:
+                try:
+                    await self._sink(frame)
+                except Exception as exc:
+                    print(f"[VibeVoice] Audio fan-out error: {exc}")
+                self.frames_delivered += 1
@@ -0,0 +1,200 @@
+"""
+Persistent content-addressed cache of rendered audio.
+
+Entries are keyed by a hash of the text, voice, sampling parameters and the
+engine's model identity, and stored as mono PCM16 behind a 16-byte header:
+
+    magic "VVA1" | sample_rate u32 | n_samples u32 | reserved u32   (little endian)
+
+Files are written by a background thread via temp file + ``os.replace``, so
+readers in any process see either a complete entry or none. Eviction is
+size-bounded LRU by mtime (touched on every hit) and runs under an advisory
+file lock, so several server processes can share one directory.
+
+Speculative entries (prefetched lines nobody has asked for yet) are written
+with an mtime ``SPECULATIVE_AGE`` in the past: they sort before every real
+entry, so eviction drops them first, and the first hit touches them into an
+ordinary entry. No side table is needed, and other processes see the same.
+"""
+
+import hashlib
+import json
+import os
+import queue
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: eviction is still safe, just not serialized
+    fcntl = None
+
+HEADER = struct.Struct("<4sIII")
+MAGIC = b"VVA1"
+SUFFIX = ".pcm"
+SPECULATIVE_AGE = 10 * 365 * 86400  # mtime offset of never-used speculative entries
+
+
+class AudioCache:
+    """Disk-backed rendered-audio store shared between server processes."""
+
+    def __init__(self, directory: Path, max_bytes: int, write_queue: int = 64):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=write_queue)
+        self._writer = threading.Thread(target=self._write_loop, name="audio-cache-writer", daemon=True)
+        self._writer.start()
+        self._approx_bytes = self._scan_bytes()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.dropped_writes = 0
+        self.evictions = 0
+        self.speculative_writes = 0
+        self.speculative_hits = 0  # speculative entries used for the first time
+        self.speculative_evictions = 0  # speculative entries evicted unused
+
+    @staticmethod
+    def key_for(text: str, voice: str, params: Dict[str, Any], model: Dict[str, Any]) -> str:
+        payload = json.dumps(
+            {"text": " ".join(text.split()), "voice": voice, "params": params, "model": model},
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}{SUFFIX}"
+
+    def contains(self, key: str) -> bool:
+        """Whether an entry exists, without reading it or counting a hit or miss."""
+        return self._path(key).exists()
+
+    def get(self, key: str) -> Optional[tuple]:
+        """Return ``(float32 audio, sample_rate)`` or None."""
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+
+        if len(data) < HEADER.size:
+            self.misses += 1
+            return None
+        magic, sample_rate, n_samples, _ = HEADER.unpack_from(data)
+        if magic != MAGIC or len(data) != HEADER.size + 2 * n_samples:
+            # Corrupt or foreign file; drop it so it gets rewritten
+            path.unlink(missing_ok=True)
+            self.misses += 1
+            return None
+
+        try:
+            if _is_speculative(path.stat().st_mtime):
+                self.speculative_hits += 1
+            os.utime(path)  # LRU recency
+        except FileNotFoundError:
+            pass
+        self.hits += 1
+        pcm = np.frombuffer(data, dtype="<i2", offset=HEADER.size)
+        return pcm.astype(np.float32) / 32767.0, sample_rate
+
+    def put_async(self, key: str, audio: np.ndarray, sample_rate: int, speculative: bool = False) -> None:
+        """Queue an entry for writing; drops it rather than block if the writer is behind.
+
+        ``speculative`` entries are evicted before any entry that has been used.
+        """
+        if self.max_bytes <= 0 or audio.size == 0:
+            return
+        pcm = (np.clip(audio, -1.0, 1.0) * 32767.0).astype("<i2")
+        try:
+            self._queue.put_nowait((key, pcm, sample_rate, speculative))
+        except queue.Full:
+            self.dropped_writes += 1
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._writer.join(timeout=5)
+
+    def _write_loop(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            key, pcm, sample_rate, speculative = item
+            try:
+                self._write(key, pcm, sample_rate, speculative)
+            except OSError as exc:
+                print(f"[VibeVoice] Audio cache write failed: {exc}")
+
+    def _write(self, key: str, pcm: np.ndarray, sample_rate: int, speculative: bool) -> None:
+        path = self._path(key)
+        if path.exists():
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp, "wb") as f:
+            f.write(HEADER.pack(MAGIC, sample_rate, pcm.size, 0))
+            f.write(pcm.tobytes())
+        if speculative:
+            now = time.time()
+            os.utime(tmp, (now, now - SPECULATIVE_AGE))
+            self.speculative_writes += 1
+        os.replace(tmp, path)
+        self.writes += 1
+        self._approx_bytes += HEADER.size + pcm.nbytes
+        if self._approx_bytes > self.max_bytes:
+            self._evict()
+
+    def _scan_bytes(self) -> int:
+        return sum(p.stat().st_size for p in self.directory.glob(f"*/*{SUFFIX}"))
+
+    def _evict(self) -> None:
+        """Delete least recently used entries until under 90% of the budget."""
+        lock_path = self.directory / ".evict.lock"
+        with open(lock_path, "w") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            entries = []
+            for path in self.directory.glob(f"*/*{SUFFIX}"):
+                try:
+                    st = path.stat()
+                except FileNotFoundError:
+                    continue  # another process evicted it
+                entries.append((st.st_mtime, st.st_size, path))
+            total = sum(size for _, size, _ in entries)
+            target = int(self.max_bytes * 0.9)
+            for mtime, size, path in sorted(entries):
+                if total <= target:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+                self.evictions += 1
+                if _is_speculative(mtime):
+                    self.speculative_evictions += 1
+            self._approx_bytes = total
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "dir": str(self.directory),
+            "bytes": self._approx_bytes,
+            "maxBytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "droppedWrites": self.dropped_writes,
+            "evictions": self.evictions,
+            "speculativeWrites": self.speculative_writes,
+            "speculativeHits": self.speculative_hits,
+            "speculativeEvictions": self.speculative_evictions,
+        }
+
+
+def _is_speculative(mtime: float) -> bool:
+    return mtime < time.time() - SPECULATIVE_AGE / 2
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the server's audio post-processing stages.
+
+Feeds synthetic 24kHz audio through each stage in frame-sized chunks on a
+single core and reports the real-time factor (processing time / audio time).
+
+Usage:
+    python bench_audio.py              # all stages
+    python bench_audio.py resample     # one stage
+    python bench_audio.py --seconds 120 --frame-ms 20
+"""
+
+import argparse
+import time
+from typing import Callable, Dict
+
+import numpy as np
+
+from resample import PolyphaseResampler
+from silence import SilenceTrimmer
+from timestretch import TimeStretcher
+
+SAMPLE_RATE = 24_000
+
+
+def synth_audio(seconds: float) -> np.ndarray:
+    """Speech-like test signal: a few harmonics with a syllabic envelope."""
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    voice = sum(np.sin(2 * np.pi * f * t) / (i + 1) for i, f in enumerate((140, 280, 420, 1100)))
+    envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 4 * t)
+    return (0.3 * voice * envelope).astype(np.float32)
+
+
+def run_chunked(process: Callable[[np.ndarray], np.ndarray], audio: np.ndarray, frame: int) -> float:
+    start = time.perf_counter()
+    for i in range(0, audio.size, frame):
+        process(audio[i:i + frame])
+    return time.perf_counter() - start
+
+
+def bench_resample(audio: np.ndarray, frame: int) -> None:
+    for out_rate in (48_000, 44_100):
+        resampler = PolyphaseResampler(SAMPLE_RATE, out_rate)
+        elapsed = run_chunked(resampler.process, audio, frame)
+        report(f"resample 24000->{out_rate}", elapsed, audio)
+
+
+def bench_trim(audio: np.ndarray, frame: int) -> None:
+    # Gate the signal so every 2s utterance-like block has 0.5s of silence to find
+    t = np.arange(audio.size) / SAMPLE_RATE
+    gated = np.where((t % 2.0) < 1.5, audio, 1e-4 * np.sin(2 * np.pi * 50 * t)).astype(np.float32)
+    trimmer = SilenceTrimmer(SAMPLE_RATE, max_pause_ms=300)
+    elapsed = run_chunked(trimmer.push, gated, frame)
+    trimmer.flush()
+    report("silence trim", elapsed, gated)
+
+
+def bench_stretch(audio: np.ndarray, frame: int) -> None:
+    for rate in (1.25, 0.85):
+        stretcher = TimeStretcher(SAMPLE_RATE, rate)
+        elapsed = run_chunked(stretcher.push, audio, frame)
+        stretcher.flush()
+        report(f"time-stretch x{rate}", elapsed, audio)
+
+
+STAGES: Dict[str, Callable[[np.ndarray, int], None]] = {
+    "resample": bench_resample,
+    "trim": bench_trim,
+    "stretch": bench_stretch,
+}
+
+
+def report(name: str, elapsed: float, audio: np.ndarray) -> None:
+    duration = audio.size / SAMPLE_RATE
+    rtf = elapsed / duration
+    print(f"{name:<24} {elapsed * 1000:9.1f} ms for {duration:.0f}s audio   RTF {rtf:.4f}   ({1 / rtf:,.0f}x real time)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark audio post-processing stages")
+    parser.add_argument("stages", nargs="*", help=f"Stages to run: {', '.join(STAGES)} (default: all)")
+    parser.add_argument("--seconds", type=float, default=60.0, help="Seconds of synthetic audio")
+    parser.add_argument("--frame-ms", type=int, default=40, help="Chunk size fed to each stage")
+    args = parser.parse_args()
+
+    unknown = set(args.stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(sorted(unknown))}")
+
+    audio = synth_audio(args.seconds)
+    frame = SAMPLE_RATE * args.frame_ms // 1000
+    for name in args.stages or STAGES:
+        STAGES[name](audio, frame)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Synthesis engine interface.
+
+The HTTP/WebSocket layer in ``vibevoice_server.py`` only talks to a
+``TTSEngine``: load it, list its voices, and iterate float32 chunks for a
+line of text. ``StreamingTTSService`` (VibeVoice) is the production
+implementation; ``SyntheticEngine`` is a deterministic CPU stand-in for
+benchmarking and testing the serving path without model weights.
+"""
+
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from memory import process_rss_bytes
+from profiling import NULL_TRACE
+
+SAMPLE_RATE = 24_000
+ENGINES = ("vibevoice", "synthetic")
+
+
+def pcm16(chunk: np.ndarray) -> bytes:
+    """Convert float32 audio chunk to PCM16 bytes."""
+    chunk = np.clip(chunk, -1.0, 1.0)
+    return (chunk * 32767.0).astype(np.int16).tobytes()
+
+
+class StartupProgress:
+    """Named, timed startup phases, readable from other threads while loading.
+
+    Phases may run concurrently; each one is logged with its duration when it
+    finishes so slow startups show which step to look at.
+    """
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.finished: Optional[float] = None
+        self.error: Optional[str] = None
+        self.phases: Dict[str, Dict[str, Any]] = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        entry: Dict[str, Any] = {"state": "running", "seconds": None}
+        self.phases = {**self.phases, name: entry}
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException as exc:
+            entry["state"], entry["seconds"] = "failed", round(time.perf_counter() - start, 3)
+            self.error = f"{name}: {exc}"
+            raise
+        entry["state"], entry["seconds"] = "done", round(time.perf_counter() - start, 3)
+        print(f"[Startup] {name} took {entry['seconds']:.2f}s")
+
+    def done(self) -> None:
+        self.finished = time.monotonic()
+        print(f"[Startup] Ready after {self.finished - self.started:.2f}s")
+
+    def fail(self, exc: BaseException) -> None:
+        self.error = self.error or str(exc)
+
+    def snapshot(self) -> Dict[str, Any]:
+        end = self.finished if self.finished is not None else time.monotonic()
+        return {
+            "ready": self.finished is not None,
+            "elapsed": round(end - self.started, 3),
+            "phases": {name: dict(entry) for name, entry in self.phases.items()},
+            "error": self.error,
+        }
+
+
+class TTSEngine(ABC):
+    """Base class for synthesis engines; subclasses must implement the abstract methods."""
+
+    name = "base"
+    model_name = ""
+    sample_rate = SAMPLE_RATE
+    device = "cpu"
+    default_voice_key: Optional[str] = None
+
+    chunk_to_pcm16 = staticmethod(pcm16)
+
+    def __init__(self):
+        self.startup = StartupProgress()
+
+    @property
+    @abstractmethod
+    def is_loaded(self) -> bool:
+        """True once ``load()`` has finished and requests can be served."""
+
+    @abstractmethod
+    def load(self) -> None:
+        """Load weights and voices; record phases on ``self.startup``."""
+
+    @abstractmethod
+    def list_voices(self) -> List[str]:
+        """Voice keys this engine can speak with."""
+
+    @abstractmethod
+    def stream(
+        self,
+        text: str,
+        cfg_scale: float = 1.5,
+        voice_key: Optional[str] = None,
+        stop_event: Optional[threading.Event] = None,
+        trace=NULL_TRACE,
+    ) -> Iterator[np.ndarray]:
+        """Yield float32 mono chunks at ``sample_rate`` until done or stopped."""
+
+    def resolve_voice(self, voice_key: Optional[str]) -> str:
+        """Map a requested voice (or None) to one this engine will use."""
+        return voice_key if voice_key and voice_key in self.list_voices() else self.default_voice_key
+
+    def cache_identity(self) -> Dict[str, Any]:
+        """Everything besides text, voice and request params that changes the audio."""
+        return {"engine": self.name, "model": self.model_name, "sampleRate": self.sample_rate}
+
+    def voice_revision(self, voice_key: str) -> str:
+        """Changes whenever the voice's conditioning changes (e.g. its preset file)."""
+        return ""
+
+    # Optional capabilities; engines override what they support.
+
+    def prepare_voice(self, voice_key: str) -> None:
+        """Make a voice's state resident before a batch of requests for it."""
+
+    def voice_info(self) -> Dict[str, Any]:
+        return {"voices": self.list_voices(), "default": self.default_voice_key}
+
+    def warm_voices(self) -> List[str]:
+        """Voices that can start generating without loading anything first."""
+        return self.list_voices()
+
+    def reload_voices(self) -> Dict[str, list]:
+        return {"added": [], "changed": [], "removed": []}
+
+    def start_voice_watcher(self, interval: float) -> None:
+        pass
+
+    def start_watchdog(self, deadline: float, interval: float = 5.0) -> None:
+        pass
+
+    def start_workers(self, count: int) -> None:
+        """Start persistent generation threads, for engines that generate off-thread."""
+
+    def worker_report(self) -> Optional[Dict[str, Any]]:
+        return None
+
+    def memory_report(self) -> Dict[str, Any]:
+        return {
+            "voices": {},
+            "voicesBytes": 0,
+            "inputCacheBytes": 0,
+            "generations": [],
+            "generationsBytes": 0,
+            "stalledGenerations": 0,
+            "processRss": process_rss_bytes(),
+            "device": {},
+        }
+
+
+def create_engine(kind: str, model_path: str, device: str) -> TTSEngine:
+    """Build an engine by name. Cheap: heavy dependencies are imported in ``load()``."""
+    if kind == "synthetic":
+        from synthetic_engine import SyntheticEngine
+        return SyntheticEngine.from_env()
+    if kind == "vibevoice":
+        from vibevoice_engine import StreamingTTSService
+        return StreamingTTSService(model_path=model_path, device=device)
+    raise ValueError(f"Unknown engine {kind!r}, expected one of {ENGINES}")
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Load generator for the VibeVoice TTS server.
+
+Opens N /ws/audio listeners, drives /speak at a fixed rate (or replays a
+lyrics timeline), and reports per-request and per-listener latency
+percentiles. Every request carries an id that the server echoes on its audio
+messages, so concurrent utterances can be told apart on the broadcast.
+
+Metrics:
+- TTFA: POST sent -> first audio frame at a listener
+- TTLC: POST sent -> final frame at a listener
+- late frames: frames that arrive after a real-time player would have
+  needed them (the player starts at the first frame of each utterance)
+- dropped frames: gaps in the per-request sequence numbers
+- listener lag: how far each listener trails the fastest one per frame
+
+Usage:
+    python vibevoice_server.py --engine synthetic --port 3030   # CPU-only target
+    python loadtest.py --listeners 4 --rate 2 --duration 30
+    python loadtest.py --lyrics /tmp/karaoke-lyrics.json --lead-ms 800
+    python loadtest.py --url http://localhost:3030 --json report.json
+"""
+
+import argparse
+import asyncio
+import base64
+import itertools
+import json
+import random
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import httpx
+import websockets
+
+DEFAULT_LINES = [
+    "Hello chat, welcome back to the stream!",
+    "This next one goes out to everyone in the front row.",
+    "I can't believe we made it to the chorus already.",
+    "Let's take it from the top.",
+    "Thank you so much for the follow!",
+    "One more time, everybody sing along.",
+]
+
+
+@dataclass
+class FrameArrival:
+    seq: int
+    at: float
+    duration: float
+    final: bool
+
+
+@dataclass
+class RequestResult:
+    id: str
+    text: str
+    sent_at: float
+    http_status: Optional[int] = None
+    http_done_at: Optional[float] = None
+    error: Optional[str] = None
+    # listener index -> frames in arrival order
+    frames: Dict[int, List[FrameArrival]] = field(default_factory=dict)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Linear-interpolated percentile of an unsorted list."""
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    return {
+        "n": len(values),
+        "p50": percentile(values, 50),
+        "p90": percentile(values, 90),
+        "p99": percentile(values, 99),
+        "max": max(values) if values else float("nan"),
+    }
+
+
+class LoadTest:
+    def __init__(self, url: str, listeners: int, rate: Optional[int], late_tolerance: float, room: Optional[str] = None):
+        self.url = url.rstrip("/")
+        self.room = room
+        params = [f"rate={rate}"] if rate else []
+        if room:
+            params.append(f"room={room}")
+        self.ws_url = self.url.replace("http", "ws", 1) + "/ws/audio"
+        if params:
+            self.ws_url += "?" + "&".join(params)
+        self.n_listeners = listeners
+        self.late_tolerance = late_tolerance
+        self.results: Dict[str, RequestResult] = {}
+        self.listener_errors: Dict[int, str] = {}
+        self._ready = asyncio.Event()
+        self._connected = 0
+
+    async def listen(self, index: int, stop: asyncio.Event) -> None:
+        try:
+            async with websockets.connect(self.ws_url, max_size=None) as ws:
+                self._connected += 1
+                if self._connected == self.n_listeners:
+                    self._ready.set()
+                while not stop.is_set():
+                    try:
+                        raw = await asyncio.wait_for(ws.recv(), timeout=0.5)
+                    except asyncio.TimeoutError:
+                        continue
+                    now = time.perf_counter()
+                    msg = json.loads(raw)
+                    if msg.get("type") != "audio" or "requestId" not in msg:
+                        continue
+                    result = self.results.get(msg["requestId"])
+                    if result is None:
+                        continue
+                    pcm_len = len(base64.b64decode(msg["audio"])) if msg["audio"] else 0
+                    duration = pcm_len / 2 / msg.get("sampleRate", 24_000)
+                    result.frames.setdefault(index, []).append(
+                        FrameArrival(msg["seq"], now, duration, msg["isFinal"])
+                    )
+        except Exception as exc:
+            self.listener_errors[index] = repr(exc)
+            self._ready.set()
+
+    async def speak(self, client: httpx.AsyncClient, text: str) -> None:
+        request_id = uuid.uuid4().hex[:10]
+        result = RequestResult(request_id, text, time.perf_counter())
+        self.results[request_id] = result
+        try:
+            body = {"text": text, "id": request_id}
+            if self.room:
+                body["room"] = self.room
+            res = await client.post(f"{self.url}/speak", json=body)
+            result.http_status = res.status_code
+        except Exception as exc:
+            result.error = repr(exc)
+        result.http_done_at = time.perf_counter()
+
+    async def run(self, schedule: List[tuple], drain: float) -> None:
+        """Run listeners and send ``(offset_seconds, text)`` requests."""
+        stop = asyncio.Event()
+        listeners = [asyncio.create_task(self.listen(i, stop)) for i in range(self.n_listeners)]
+        await asyncio.wait_for(self._ready.wait(), timeout=10)
+
+        async with httpx.AsyncClient(timeout=None) as client:
+            start = time.perf_counter()
+            tasks = []
+            for offset, text in schedule:
+                delay = start + offset - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                tasks.append(asyncio.create_task(self.speak(client, text)))
+            await asyncio.gather(*tasks)
+
+        await asyncio.sleep(drain)
+        stop.set()
+        await asyncio.gather(*listeners)
+
+    def report(self) -> Dict[str, object]:
+        ttfa, ttlc, lag = [], [], []
+        late = dropped = frames_total = 0
+        incomplete = 0
+        per_listener_lag: Dict[int, List[float]] = {}
+
+        for result in self.results.values():
+            earliest: Dict[int, float] = {}
+            for frames in result.frames.values():
+                for f in frames:
+                    earliest[f.seq] = min(earliest.get(f.seq, f.at), f.at)
+
+            for listener, frames in result.frames.items():
+                ttfa.append(frames[0].at - result.sent_at)
+                if frames[-1].final:
+                    ttlc.append(frames[-1].at - result.sent_at)
+                else:
+                    incomplete += 1
+
+                seqs = sorted(f.seq for f in frames)
+                dropped += (seqs[-1] - seqs[0] + 1) - len(seqs)
+
+                # Real-time player: starts at the first frame, needs each next frame
+                # once the audio before it has played out
+                due = frames[0].at
+                for f in frames:
+                    frames_total += 1
+                    if f.at > due + self.late_tolerance:
+                        late += 1
+                        due = f.at  # player underran and restarts from here
+                    due += f.duration
+
+                for f in frames:
+                    delta = f.at - earliest[f.seq]
+                    lag.append(delta)
+                    per_listener_lag.setdefault(listener, []).append(delta)
+
+            missing = self.n_listeners - len(result.frames)
+            incomplete += missing
+
+        errors = [r.error for r in self.results.values() if r.error]
+        errors += [f"HTTP {r.http_status}" for r in self.results.values() if r.http_status and r.http_status >= 400]
+        return {
+            "requests": len(self.results),
+            "listeners": self.n_listeners,
+            "errors": errors,
+            "listenerErrors": self.listener_errors,
+            "ttfaMs": {k: v * 1000 for k, v in summarize(ttfa).items() if k != "n"},
+            "ttlcMs": {k: v * 1000 for k, v in summarize(ttlc).items() if k != "n"},
+            "listenerLagMs": {k: v * 1000 for k, v in summarize(lag).items() if k != "n"},
+            "perListenerLagP99Ms": {i: percentile(v, 99) * 1000 for i, v in sorted(per_listener_lag.items())},
+            "frames": frames_total,
+            "lateFrames": late,
+            "droppedFrames": dropped,
+            "incompleteStreams": incomplete,
+        }
+
+
+def rate_schedule(rate: float, duration: float, texts: List[str], poisson: bool) -> List[tuple]:
+    schedule, t = [], 0.0
+    lines = itertools.cycle(texts)
+    while t < duration:
+        schedule.append((t, next(lines)))
+        t += random.expovariate(rate) if poisson else 1.0 / rate
+    return schedule
+
+
+def lyrics_schedule(path: str, lead_ms: int) -> List[tuple]:
+    with open(path) as f:
+        data = json.load(f)
+    lines = data["lyrics"] if isinstance(data, dict) else data
+    return sorted(
+        (max(0.0, (line["startMs"] - lead_ms) / 1000.0), line["text"])
+        for line in lines
+        if line.get("text", "").strip()
+    )
+
+
+def print_report(report: Dict[str, object]) -> None:
+    print(f"\nrequests={report['requests']} listeners={report['listeners']} frames={report['frames']}")
+    for name in ("ttfaMs", "ttlcMs", "listenerLagMs"):
+        stats = report[name]
+        print(f"  {name:<14} p50 {stats['p50']:8.1f}  p90 {stats['p90']:8.1f}  p99 {stats['p99']:8.1f}  max {stats['max']:8.1f}")
+    print(f"  late frames    {report['lateFrames']}")
+    print(f"  dropped frames {report['droppedFrames']}")
+    print(f"  incomplete     {report['incompleteStreams']}")
+    if report["errors"]:
+        print(f"  errors         {len(report['errors'])} (first: {report['errors'][0]})")
+    for index, err in report["listenerErrors"].items():
+        print(f"  listener {index} failed: {err}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the VibeVoice TTS server")
+    parser.add_argument("--url", default="http://localhost:3030", help="Server base URL")
+    parser.add_argument("--listeners", type=int, default=4, help="Concurrent /ws/audio listeners")
+    parser.add_argument("--sample-rate", type=int, default=None, help="Ask listeners for this rate")
+    parser.add_argument("--room", help="Broadcast room to listen and speak in (default: the server's)")
+    parser.add_argument("--rate", type=float, default=1.0, help="/speak requests per second")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds of traffic in rate mode")
+    parser.add_argument("--poisson", action="store_true", help="Exponential inter-arrival times")
+    parser.add_argument("--texts", help="File with one line of text per request (rate mode)")
+    parser.add_argument("--lyrics", help="Replay a lyrics JSON timeline instead of a fixed rate")
+    parser.add_argument("--lead-ms", type=int, default=800, help="Lead time when replaying lyrics")
+    parser.add_argument("--late-ms", type=float, default=5.0, help="Tolerance before a frame counts as late")
+    parser.add_argument("--drain", type=float, default=2.0, help="Seconds to keep listening after the last reply")
+    parser.add_argument("--json", dest="json_path", help="Also write the report as JSON")
+    args = parser.parse_args()
+
+    if args.lyrics:
+        schedule = lyrics_schedule(args.lyrics, args.lead_ms)
+    else:
+        texts = DEFAULT_LINES
+        if args.texts:
+            with open(args.texts) as f:
+                texts = [line.strip() for line in f if line.strip()]
+        schedule = rate_schedule(args.rate, args.duration, texts, args.poisson)
+
+    print(f"[LoadTest] {len(schedule)} requests, {args.listeners} listeners against {args.url}")
+    test = LoadTest(args.url, args.listeners, args.sample_rate, args.late_ms / 1000.0, room=args.room)
+    asyncio.run(test.run(schedule, args.drain))
+
+    report = test.report()
+    print_report(report)
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"[LoadTest] Wrote {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
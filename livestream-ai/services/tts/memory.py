@@ -0,0 +1,78 @@
+"""
+Memory accounting helpers for the TTS server.
+
+``nbytes`` walks nested containers (dicts, lists, model outputs, KV caches) and
+sums tensor and array storage, so voice presets and in-flight generations can
+be reported without depending on their concrete types.
+"""
+
+import os
+import resource
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+
+def nbytes(obj: Any, _seen: Optional[set] = None, _depth: int = 0) -> int:
+    """Approximate bytes held by tensors/arrays reachable from ``obj``."""
+    if _seen is None:
+        _seen = set()
+    if obj is None or isinstance(obj, (str, bytes, int, float, bool, type)) or _depth > 8:
+        return 0
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+
+    if hasattr(obj, "element_size") and hasattr(obj, "nelement"):
+        return obj.element_size() * obj.nelement()
+    if hasattr(obj, "nbytes") and hasattr(obj, "dtype"):
+        return int(obj.nbytes)
+    if isinstance(obj, dict):
+        return sum(nbytes(v, _seen, _depth + 1) for v in obj.values())
+    if isinstance(obj, (list, tuple, set)):
+        return sum(nbytes(v, _seen, _depth + 1) for v in obj)
+    if hasattr(obj, "__dict__") and not callable(obj):
+        return sum(nbytes(v, _seen, _depth + 1) for v in vars(obj).values())
+    return 0
+
+
+def process_rss_bytes() -> int:
+    """Current resident set size of this process."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # Peak rather than current RSS, but better than nothing off Linux
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+@dataclass
+class GenerationRecord:
+    """An in-flight generation and the memory it pins."""
+
+    id: int
+    text: str
+    voice: str
+    bytes: int
+    thread: Optional[threading.Thread] = None  # set by the worker that picks it up
+    started: float = field(default_factory=time.monotonic)
+    stop_event: Optional[threading.Event] = None
+    stalled: bool = False
+
+    def age(self) -> float:
+        return time.monotonic() - self.started
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "text": self.text[:60],
+            "voice": self.voice,
+            "thread": self.thread.name if self.thread else None,
+            "alive": self.thread is not None and self.thread.is_alive(),
+            "ageSeconds": round(self.age(), 2),
+            "bytes": self.bytes,
+            "stalled": self.stalled,
+        }
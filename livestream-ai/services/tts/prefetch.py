@@ -0,0 +1,86 @@
+"""
+Speculative rendering of upcoming lines into the audio cache.
+
+Between songs the next track's lyrics are known seconds before its first
+line is due. ``Prefetcher`` renders them one at a time as background work:
+the scheduler only starts a prefetch while the model is otherwise idle and
+stops it as soon as a real request is queued, after which the line waits for
+the next idle moment. Rendered audio is cached as speculative, so it is the
+first to go when the cache needs room, and a later request for the same line
+is a plain cache hit.
+"""
+
+import asyncio
+import collections
+import threading
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+MAX_ATTEMPTS = 5  # preemptions before a line is given up on
+
+
+@dataclass
+class PrefetchItem:
+    request: Any  # SpeakRequest
+    voice: str
+    attempts: int = 0
+
+
+class Prefetcher:
+    """FIFO of lines to render ahead of time; ``render`` returns one of the outcome counters."""
+
+    def __init__(
+        self,
+        render: Callable[[Any, str, threading.Event], Awaitable[str]],
+        max_attempts: int = MAX_ATTEMPTS,
+    ):
+        self._render = render
+        self.max_attempts = max_attempts
+        self._queue: Deque[PrefetchItem] = collections.deque()
+        self._task: Optional[asyncio.Task] = None
+        self._stop: Optional[threading.Event] = None
+        self.counts = {"requested": 0, "rendered": 0, "alreadyCached": 0, "preempted": 0, "dropped": 0, "failed": 0}
+
+    def submit(self, items: List[PrefetchItem], replace: bool = True) -> int:
+        """Queue lines (dropping ones still waiting from earlier calls if ``replace``); returns the queue length."""
+        if replace:
+            self.counts["dropped"] += len(self._queue)
+            self._queue.clear()
+        self._queue.extend(items)
+        self.counts["requested"] += len(items)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        return len(self._queue)
+
+    def cancel(self) -> None:
+        self.counts["dropped"] += len(self._queue)
+        self._queue.clear()
+        if self._stop is not None:
+            self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _run(self) -> None:
+        while self._queue:
+            item = self._queue.popleft()
+            self._stop = threading.Event()
+            try:
+                outcome = await self._render(item.request, item.voice, self._stop)
+            except Exception as exc:
+                print(f"[VibeVoice] Prefetch failed: {exc}")
+                self.counts["failed"] += 1
+                continue
+            finally:
+                self._stop = None
+            if outcome != "preempted":
+                self.counts[outcome] += 1
+                continue
+            self.counts["preempted"] += 1
+            item.attempts += 1
+            if item.attempts < self.max_attempts:
+                self._queue.appendleft(item)  # retried at the next idle moment
+            else:
+                self.counts["dropped"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {"queued": len(self._queue), "active": self._stop is not None, **self.counts}
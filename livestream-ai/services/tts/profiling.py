@@ -0,0 +1,139 @@
+"""
+Opt-in per-request profiling traces.
+
+A ``Trace`` records timed spans from any thread and serializes them in the
+Chrome trace-event format (load the file in chrome://tracing or Perfetto).
+When profiling is off, callers get ``NULL_TRACE``: it is falsy, its ``span``
+returns a shared no-op context manager, and nothing is recorded.
+"""
+
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+_NULL_SPAN = nullcontext()
+
+
+class Trace:
+    """Timeline of named spans for one request."""
+
+    def __init__(self, name: str, trace_id: Optional[str] = None, torch_profile: bool = False):
+        self.id = trace_id or uuid.uuid4().hex[:12]
+        self.name = name
+        self.torch_profile = torch_profile
+        self.torch_trace_path: Optional[Path] = None
+        self._t0 = time.perf_counter()
+        self._events: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def __bool__(self) -> bool:
+        return True
+
+    def _now_us(self) -> float:
+        return (time.perf_counter() - self._t0) * 1e6
+
+    def _add(self, event: Dict[str, Any]) -> None:
+        event.setdefault("pid", os.getpid())
+        event.setdefault("tid", threading.get_ident())
+        with self._lock:
+            self._events.append(event)
+
+    @contextmanager
+    def span(self, name: str, **args: Any):
+        start = self._now_us()
+        try:
+            yield
+        finally:
+            self._add({"name": name, "ph": "X", "ts": start, "dur": self._now_us() - start, "args": args})
+
+    def instant(self, name: str, **args: Any) -> None:
+        self._add({"name": name, "ph": "i", "s": "t", "ts": self._now_us(), "args": args})
+
+    def to_chrome(self) -> Dict[str, Any]:
+        with self._lock:
+            events = list(self._events)
+        thread_names = {
+            t.ident: t.name for t in threading.enumerate() if t.ident in {e["tid"] for e in events}
+        }
+        meta = [
+            {"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": name}}
+            for tid, name in thread_names.items()
+        ]
+        other = {"id": self.id, "name": self.name}
+        if self.torch_trace_path is not None:
+            other["torchTrace"] = self.torch_trace_path.name
+        return {"traceEvents": meta + events, "displayTimeUnit": "ms", "otherData": other}
+
+    def save(self, directory: Path) -> Path:
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{self.id}.json"
+        path.write_text(json.dumps(self.to_chrome()))
+        return path
+
+
+class _NullTrace:
+    """Stand-in used when profiling is disabled."""
+
+    id = None
+    torch_profile = False
+
+    def __bool__(self) -> bool:
+        return False
+
+    def span(self, name: str, **args: Any):
+        return _NULL_SPAN
+
+    def instant(self, name: str, **args: Any) -> None:
+        pass
+
+
+NULL_TRACE = _NullTrace()
+
+
+class Profiler:
+    """Decides which requests get traced and stores the resulting files."""
+
+    def __init__(self, directory: Path, sample_rate: float = 0.0, torch_profile: bool = False, keep: int = 50):
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.torch_profile = torch_profile
+        self.keep = keep
+
+    def start(self, name: str, requested: bool = False):
+        if requested or (self.sample_rate > 0 and random.random() < self.sample_rate):
+            trace = Trace(name, torch_profile=self.torch_profile)
+            if trace.torch_profile:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                trace.torch_trace_path = self.directory / f"{trace.id}.torch.json"
+            return trace
+        return NULL_TRACE
+
+    def save(self, trace: Trace) -> Path:
+        path = trace.save(self.directory)
+        self._prune()
+        return path
+
+    def list(self) -> List[Dict[str, Any]]:
+        if not self.directory.exists():
+            return []
+        files = sorted(self.directory.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+        return [{"file": p.name, "bytes": p.stat().st_size, "mtime": p.stat().st_mtime} for p in files]
+
+    def path_for(self, name: str) -> Optional[Path]:
+        path = self.directory / Path(name).name
+        return path if path.suffix == ".json" and path.exists() else None
+
+    def _prune(self) -> None:
+        traces = sorted(
+            (p for p in self.directory.glob("*.json") if not p.name.endswith(".torch.json")),
+            key=lambda p: p.stat().st_mtime,
+        )
+        for old in traces[:-self.keep] if self.keep > 0 else []:
+            old.unlink(missing_ok=True)
+            old.with_suffix(".torch.json").unlink(missing_ok=True)
@@ -0,0 +1,172 @@
+"""
+Archive of everything the server broadcasts, for VOD editing and replay.
+
+``StreamRecorder`` gets the same PCM16 frames as the WebSocket fan-out via a
+bounded queue and writes them on its own thread, one WAV file per utterance
+in a per-session directory:
+
+    recordings/20250101-201500/
+        0001-3f2a9c1d0e.wav
+        0002-77b1c0aa42.wav
+        index.jsonl     one line per utterance: file, requestId, text, voice, room,
+                        wall-clock start/end, offset from session start,
+                        duration, dropped audio
+
+``offer()`` never blocks: when the disk falls behind and the queue is full the
+frame is dropped and the utterance is flagged in the index, so recording can
+never delay the live stream.
+"""
+
+import json
+import queue
+import threading
+import time
+import wave
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from audio_bridge import AudioFrame
+
+IDLE_CLOSE_S = 30.0  # close utterances whose final frame was dropped
+
+
+@dataclass
+class _Utterance:
+    request_id: str
+    path: Path
+    wav: Any
+    started: float
+    text: str = ""
+    voice: Optional[str] = None
+    room: Optional[str] = None
+    samples: int = 0
+    last_frame: float = field(default_factory=time.time)
+
+
+class StreamRecorder:
+    """Non-blocking recorder sink for broadcast frames."""
+
+    def __init__(self, directory: Path, sample_rate: int, queue_size: int = 1024):
+        self.sample_rate = sample_rate
+        self.started = time.time()
+        self.directory = Path(directory) / time.strftime("%Y%m%d-%H%M%S", time.localtime(self.started))
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=queue_size)
+        self._meta: Dict[str, tuple] = {}  # request id -> (text, voice, room), set from the event loop
+        self._dropped: Dict[str, int] = {}  # request id -> dropped samples
+        self._open: Dict[str, _Utterance] = {}
+        self._count = 0
+        self._index = open(self.directory / "index.jsonl", "a", encoding="utf-8")
+        self._writer = threading.Thread(target=self._write_loop, name="stream-recorder", daemon=True)
+        self._writer.start()
+        self.frames_written = 0
+        self.frames_dropped = 0
+        self.bytes_written = 0
+        self.utterances = 0
+        self.write_errors = 0
+
+    def annotate(self, request_id: str, text: str, voice: Optional[str] = None, room: Optional[str] = None) -> None:
+        """Attach the text, voice and room of an utterance before its frames arrive."""
+        self._meta[request_id] = (text, voice, room)
+
+    def offer(self, frame: AudioFrame) -> None:
+        """Queue a frame for writing; drops it if the writer is behind."""
+        if frame.request_id is None:
+            return
+        try:
+            self._queue.put_nowait((frame.request_id, frame.pcm, frame.is_final, time.time()))
+        except queue.Full:
+            self.frames_dropped += 1
+            self._dropped[frame.request_id] = self._dropped.get(frame.request_id, 0) + len(frame.pcm) // 2
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._writer.join(timeout=10)
+
+    def _write_loop(self) -> None:
+        while True:
+            try:
+                item = self._queue.get(timeout=1.0)
+            except queue.Empty:
+                self._close_idle()
+                continue
+            if item is None:
+                break
+            request_id, pcm, is_final, at = item
+            try:
+                self._write(request_id, pcm, is_final, at)
+            except OSError as exc:
+                self.write_errors += 1
+                print(f"[VibeVoice] Recorder write failed: {exc}")
+        for request_id in list(self._open):
+            self._finish(request_id, complete=False)
+        self._index.close()
+
+    def _write(self, request_id: str, pcm: bytes, is_final: bool, at: float) -> None:
+        utterance = self._open.get(request_id)
+        if utterance is None:
+            if not pcm and is_final:
+                self._meta.pop(request_id, None)
+                return  # nothing was spoken (e.g. stopped before the first frame)
+            utterance = self._start(request_id, at)
+        if pcm:
+            utterance.wav.writeframesraw(pcm)
+            utterance.samples += len(pcm) // 2
+            utterance.last_frame = at
+            self.frames_written += 1
+            self.bytes_written += len(pcm)
+        if is_final:
+            self._finish(request_id, complete=True)
+
+    def _start(self, request_id: str, at: float) -> _Utterance:
+        self._count += 1
+        safe_id = "".join(c if c.isalnum() or c in "-_" else "_" for c in request_id)[:40]
+        path = self.directory / f"{self._count:04d}-{safe_id}.wav"
+        wav = wave.open(str(path), "wb")
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(self.sample_rate)
+        text, voice, room = self._meta.pop(request_id, ("", None, None))
+        utterance = _Utterance(request_id, path, wav, at, text=text, voice=voice, room=room, last_frame=at)
+        self._open[request_id] = utterance
+        return utterance
+
+    def _finish(self, request_id: str, complete: bool) -> None:
+        utterance = self._open.pop(request_id)
+        utterance.wav.close()
+        dropped = self._dropped.pop(request_id, 0)
+        entry = {
+            "file": utterance.path.name,
+            "requestId": request_id,
+            "text": utterance.text,
+            "voice": utterance.voice,
+            "room": utterance.room,
+            "startedAt": round(utterance.started, 3),
+            "endedAt": round(utterance.last_frame, 3),
+            "offsetMs": round((utterance.started - self.started) * 1000),
+            "durationMs": round(utterance.samples * 1000 / self.sample_rate),
+            "droppedMs": round(dropped * 1000 / self.sample_rate),
+            "complete": complete and not dropped,
+        }
+        self._index.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._index.flush()
+        self.utterances += 1
+
+    def _close_idle(self) -> None:
+        now = time.time()
+        for request_id, utterance in list(self._open.items()):
+            if now - utterance.last_frame > IDLE_CLOSE_S:
+                self._finish(request_id, complete=False)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "dir": str(self.directory),
+            "queued": self._queue.qsize(),
+            "open": len(self._open),
+            "utterances": self.utterances,
+            "framesWritten": self.frames_written,
+            "framesDropped": self.frames_dropped,
+            "bytesWritten": self.bytes_written,
+            "writeErrors": self.write_errors,
+        }
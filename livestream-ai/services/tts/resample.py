@@ -0,0 +1,113 @@
+"""
+Streaming polyphase resampler for the output stage.
+
+The model produces 24kHz audio, while PipeWire, Chrome and OBS usually run at
+48kHz or 44.1kHz. ``PolyphaseResampler`` converts between rational rates with a
+Kaiser-windowed sinc filter, keeping input history and output phase across
+chunks so that consecutive frames join seamlessly.
+"""
+
+from math import gcd
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+class PolyphaseResampler:
+    """Rational-ratio resampler that keeps its filter state between calls."""
+
+    def __init__(
+        self,
+        in_rate: int,
+        out_rate: int,
+        taps_per_phase: int = 16,
+        rolloff: float = 0.92,
+        beta: float = 8.0,
+    ):
+        if in_rate <= 0 or out_rate <= 0:
+            raise ValueError("sample rates must be positive")
+        g = gcd(in_rate, out_rate)
+        self.in_rate = in_rate
+        self.out_rate = out_rate
+        self.up = out_rate // g
+        self.down = in_rate // g
+        self.taps = taps_per_phase
+
+        # Prototype low-pass filter at the upsampled rate, cut at the lower Nyquist
+        n = self.taps * self.up
+        cutoff = rolloff * min(1.0, self.up / self.down)
+        m = np.arange(n, dtype=np.float64) - (n - 1) / 2.0
+        proto = cutoff * np.sinc(cutoff * m / self.up) * np.kaiser(n, beta)
+        proto *= self.up / proto.sum()
+
+        # bank[p] holds the taps for output phase p, reversed to match input windows
+        self._bank = np.ascontiguousarray(
+            proto.reshape(self.taps, self.up).T[:, ::-1], dtype=np.float32
+        )
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget filter history, e.g. at an utterance boundary."""
+        self._history = np.zeros(self.taps - 1, dtype=np.float32)
+        self._next = 0  # position of the next output on the upsampled grid
+
+    def process(self, chunk: np.ndarray) -> np.ndarray:
+        """Resample one chunk of float32 audio."""
+        chunk = np.asarray(chunk, dtype=np.float32).reshape(-1)
+        if self.up == self.down:
+            return chunk.copy()
+
+        span = chunk.size * self.up
+        if self._next >= span:
+            self._next -= span
+            self._history = np.concatenate((self._history, chunk))[-(self.taps - 1):]
+            return np.zeros(0, dtype=np.float32)
+
+        count = (span - self._next + self.down - 1) // self.down
+        pos = self._next + self.down * np.arange(count, dtype=np.int64)
+        idx = pos // self.up
+        phase = pos % self.up
+
+        ext = np.concatenate((self._history, chunk))
+        windows = sliding_window_view(ext, self.taps)[idx]
+        out = np.einsum("ij,ij->i", windows, self._bank[phase])
+
+        self._next = int(pos[-1]) + self.down - span
+        self._history = ext[-(self.taps - 1):]
+        return out.astype(np.float32, copy=False)
+
+    def flush(self) -> np.ndarray:
+        """Emit the samples still held in the filter delay line and reset."""
+        tail = self.process(np.zeros(self.taps // 2, dtype=np.float32))
+        self.reset()
+        return tail
+
+
+class ResamplerBank:
+    """Resamplers for one broadcast channel, one per (utterance, target rate).
+
+    Utterances in flight at the same time interleave their frames, so each
+    keeps its own filter history and phase; all clients at a rate share it.
+    """
+
+    def __init__(self, in_rate: int):
+        self.in_rate = in_rate
+        self._resamplers: Dict[Tuple[Optional[int], int], PolyphaseResampler] = {}
+
+    def get(self, out_rate: int, stream: Optional[int] = None) -> Optional[PolyphaseResampler]:
+        if out_rate == self.in_rate:
+            return None
+        resampler = self._resamplers.get((stream, out_rate))
+        if resampler is None:
+            resampler = PolyphaseResampler(self.in_rate, out_rate)
+            self._resamplers[(stream, out_rate)] = resampler
+        return resampler
+
+    def release(self, stream: Optional[int]) -> None:
+        """Forget an utterance's resamplers once its final frame went out."""
+        for key in [k for k in self._resamplers if k[0] == stream]:
+            del self._resamplers[key]
+
+    def rates(self) -> list[int]:
+        return sorted({rate for _, rate in self._resamplers})
@@ -0,0 +1,176 @@
+"""
+Priority scheduler that groups queued generations by voice.
+
+Each ``/speak`` becomes a job with a voice and a priority. A fixed number of
+worker slots (one per concurrent generation the model can sustain) each take
+the highest-priority queued job whenever they go idle, one job at a time, so
+every slot stays busy and urgent work never waits behind claimed lines.
+Among equally urgent jobs, the room (broadcast channel) served least recently
+goes first, so one busy show cannot starve another, then the voice the slot
+is already running: a slot resolves a voice's prefill state only when it
+switches voices, and keeps preferring its voice for up to ``max_batch`` jobs
+in a row before equally urgent older work in other voices gets a turn.
+
+Background jobs (e.g. prefetching upcoming lines) only start while no other
+job is queued or running, and are told to stop as soon as one is queued.
+"""
+
+import asyncio
+import itertools
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+
+@dataclass
+class Job:
+    voice: str
+    priority: int
+    run: Callable[[], Any]  # blocking; executed on a worker thread
+    seq: int = 0
+    future: Optional[asyncio.Future] = None
+    room: str = ""
+    preempt: Optional[Callable[[], None]] = None  # set for background jobs
+
+    @property
+    def background(self) -> bool:
+        return self.preempt is not None
+
+    def sort_key(self) -> tuple:
+        return (-self.priority, self.seq)
+
+
+@dataclass
+class SlotState:
+    index: int
+    voice: Optional[str] = None  # voice whose state this slot last resolved
+    run: int = 0  # jobs in a row in that voice
+    job: Optional[Job] = None
+
+
+class VoiceBatchScheduler:
+    """Runs blocking generation jobs on ``slots`` workers, grouped by voice."""
+
+    def __init__(
+        self,
+        slots: int = 1,
+        max_batch: int = 8,
+        prepare_voice: Optional[Callable[[str], Any]] = None,
+    ):
+        self.slots = max(1, slots)
+        self.max_batch = max(1, max_batch)
+        self._prepare_voice = prepare_voice
+        self._pending: List[Job] = []
+        self._seq = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._workers: List[asyncio.Task] = []
+        self._slot_states = [SlotState(i) for i in range(self.slots)]
+        self._room_served: Dict[str, int] = {}  # room -> turn it was last served in
+        self._turns = itertools.count()
+        self.voice_switches = 0
+        self.jobs_done = 0
+
+    def start(self) -> None:
+        self._wakeup = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        self._workers = [loop.create_task(self._worker(state)) for state in self._slot_states]
+
+    async def stop(self) -> None:
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def run(
+        self,
+        voice: str,
+        priority: int,
+        fn: Callable[[], Any],
+        room: str = "",
+        preempt: Optional[Callable[[], None]] = None,
+    ) -> Any:
+        """Queue ``fn`` and wait for its result.
+
+        Passing ``preempt`` makes it a background job; ``preempt`` is called on
+        the event loop when other work is queued while it runs, and ``fn``
+        should then return early.
+        """
+        job = Job(voice, priority, fn, next(self._seq), asyncio.get_running_loop().create_future(), room, preempt)
+        self._pending.append(job)
+        if not job.background:
+            for state in self._slot_states:
+                if state.job is not None and state.job.background:
+                    state.job.preempt()
+        self._wakeup.set()
+        return await job.future
+
+    def _take(self, state: SlotState) -> Optional[Job]:
+        self._pending.sort(key=Job.sort_key)
+        candidates = [j for j in self._pending if not j.background]
+        if not candidates:
+            if any(s.job is not None and not s.job.background for s in self._slot_states):
+                return None  # background work waits until the model is idle
+            candidates = self._pending
+        top = candidates[0].priority
+        stay = state.voice if state.run < self.max_batch else None
+        job = min(
+            (j for j in candidates if j.priority == top),
+            key=lambda j: (self._room_served.get(j.room, -1), j.voice != stay, j.seq),
+        )
+        self._room_served[job.room] = next(self._turns)
+        self._pending.remove(job)
+        return job
+
+    async def _worker(self, state: SlotState) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            job = self._take(state) if self._pending else None
+            if job is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            if job.future.done():  # caller went away
+                continue
+
+            state.job = job
+            try:
+                if job.voice != state.voice:
+                    state.voice, state.run = None, 0
+                    if self._prepare_voice is not None:
+                        await loop.run_in_executor(None, self._prepare_voice, job.voice)
+                    state.voice = job.voice
+                    self.voice_switches += 1
+                state.run = state.run + 1 if state.run < self.max_batch else 1
+                result = await loop.run_in_executor(None, job.run)
+                if not job.future.done():
+                    job.future.set_result(result)
+            except Exception as exc:
+                if not job.future.done():
+                    job.future.set_exception(exc)
+            finally:
+                state.job = None
+            self.jobs_done += 1
+            self._wakeup.set()  # background work may have been waiting for the model to go idle
+
+    def stats(self) -> Dict[str, Any]:
+        pending_by_voice: Dict[str, int] = {}
+        pending_by_room: Dict[str, int] = {}
+        background = 0
+        for job in self._pending:
+            if job.background:
+                background += 1
+                continue
+            pending_by_voice[job.voice] = pending_by_voice.get(job.voice, 0) + 1
+            pending_by_room[job.room] = pending_by_room.get(job.room, 0) + 1
+        return {
+            "slots": self.slots,
+            "pending": len(self._pending) - background,
+            "background": background,
+            "pendingByVoice": pending_by_voice,
+            "pendingByRoom": pending_by_room,
+            "running": [
+                {"slot": s.index, "voice": s.job.voice, "run": s.run, "background": s.job.background}
+                for s in self._slot_states if s.job is not None
+            ],
+            "voiceSwitches": self.voice_switches,
+            "jobsDone": self.jobs_done,
+        }
@@ -0,0 +1,139 @@
+"""
+Streaming energy-based silence trimming.
+
+Model output often starts with near-silent frames and ends with a long tail.
+``SilenceTrimmer`` sits between the engine and the broadcast:
+
+- leading silence is dropped up to the first voiced frame, keeping
+  ``lead_pad_ms`` before it so the onset is not clipped
+- silence after voiced audio is held back; if speech resumes it is released
+  (shortened to ``max_pause_ms`` when longer), at the end of the utterance
+  only ``tail_pad_ms`` of it is kept
+
+Energy is the mean square over fixed analysis frames, computed for a whole
+chunk at once; partial frames carry over to the next chunk.
+"""
+
+from typing import Dict, List
+
+import numpy as np
+
+
+class SilenceTrimmer:
+    """Trims one utterance; create a new instance per request."""
+
+    def __init__(
+        self,
+        sample_rate: int,
+        threshold_db: float = -45.0,
+        frame_ms: float = 10.0,
+        lead_pad_ms: float = 30.0,
+        tail_pad_ms: float = 120.0,
+        max_pause_ms: float = 800.0,
+    ):
+        self.sample_rate = sample_rate
+        self.threshold_db = threshold_db
+        self.frame = max(1, int(sample_rate * frame_ms / 1000))
+        self.lead_pad = int(sample_rate * lead_pad_ms / 1000)
+        self.tail_pad = int(sample_rate * tail_pad_ms / 1000)
+        self.max_pause = int(sample_rate * max_pause_ms / 1000) if max_pause_ms > 0 else None
+        self._threshold = 10.0 ** (threshold_db / 10.0)  # mean-square power
+        self._carry = np.zeros(0, dtype=np.float32)
+        self._lead = np.zeros(0, dtype=np.float32)  # last lead_pad samples before onset
+        self._held: List[np.ndarray] = []  # silence after the last voiced frame
+        self._held_size = 0
+        self._held_dropped = 0
+        self.voiced = False
+        self.leading_trimmed = 0
+        self.pause_trimmed = 0
+        self.trailing_trimmed = 0
+
+    def push(self, chunk: np.ndarray) -> np.ndarray:
+        """Feed audio; return whatever can be emitted now (possibly empty)."""
+        audio = np.concatenate((self._carry, np.asarray(chunk, dtype=np.float32)))
+        usable = audio.size - audio.size % self.frame
+        self._carry = audio[usable:]
+        return self._process(audio[:usable])
+
+    def flush(self) -> np.ndarray:
+        """End of utterance: analyze the partial frame and compact the trailing silence."""
+        out = self._process(self._carry, partial=True)
+        self._carry = np.zeros(0, dtype=np.float32)
+        dropped, self._held_dropped = self._held_dropped, 0
+        held = self._take_held()
+        self.trailing_trimmed += dropped + max(0, held.size - self.tail_pad)
+        if not self.voiced:
+            return out
+        return np.concatenate((out, held[:self.tail_pad]))
+
+    def _process(self, audio: np.ndarray, partial: bool = False) -> np.ndarray:
+        if audio.size == 0:
+            return audio
+        if partial:
+            voiced = np.array([np.mean(np.square(audio)) > self._threshold])
+            frame = audio.size
+        else:
+            power = np.mean(np.square(audio.reshape(-1, self.frame)), axis=1)
+            voiced = power > self._threshold
+            frame = self.frame
+        voiced_idx = np.flatnonzero(voiced)
+
+        out = []
+        if not self.voiced:
+            if voiced_idx.size == 0:
+                lead = np.concatenate((self._lead, audio))
+                self.leading_trimmed += max(0, lead.size - self.lead_pad)
+                self._lead = lead[max(0, lead.size - self.lead_pad):] if self.lead_pad else lead[:0]
+                return audio[:0]
+            onset = voiced_idx[0] * frame
+            lead = np.concatenate((self._lead, audio[:onset]))
+            keep = min(lead.size, self.lead_pad)
+            self.leading_trimmed += lead.size - keep
+            out.append(lead[lead.size - keep:])
+            self._lead = audio[:0]
+            self.voiced = True
+            audio, voiced_idx = audio[onset:], voiced_idx - voiced_idx[0]
+
+        if voiced_idx.size == 0:
+            self._hold(audio)
+            return np.concatenate(out) if out else audio[:0]
+
+        # Voiced stretches pass through; every silent run between them goes
+        # through the hold so long pauses are shortened whatever the chunking
+        pos = voiced_idx[0] * frame
+        self._hold(audio[:pos])
+        out.append(self._take_held())
+        for gap in np.flatnonzero(np.diff(voiced_idx) > 1):
+            stretch_end, next_start = (voiced_idx[gap] + 1) * frame, voiced_idx[gap + 1] * frame
+            out.append(audio[pos:stretch_end])
+            self._hold(audio[stretch_end:next_start])
+            out.append(self._take_held())
+            pos = next_start
+        end = (voiced_idx[-1] + 1) * frame
+        out.append(audio[pos:end])
+        self._hold(audio[end:])
+        return np.concatenate(out)
+
+    def _hold(self, audio: np.ndarray) -> None:
+        if self.max_pause is not None:
+            room = max(0, self.max_pause - self._held_size)
+            self._held_dropped += max(0, audio.size - room)
+            audio = audio[:room]
+        if audio.size:
+            self._held.append(audio)
+            self._held_size += audio.size
+
+    def _take_held(self) -> np.ndarray:
+        """Release the held silence; it was a pause, so its dropped excess counts as such."""
+        held = np.concatenate(self._held) if self._held else np.zeros(0, dtype=np.float32)
+        self.pause_trimmed += self._held_dropped
+        self._held, self._held_size, self._held_dropped = [], 0, 0
+        return held
+
+    def stats(self) -> Dict[str, float]:
+        to_ms = 1000.0 / self.sample_rate
+        return {
+            "onsetSavedMs": round(self.leading_trimmed * to_ms, 1),
+            "pauseTrimmedMs": round(self.pause_trimmed * to_ms, 1),
+            "trailingTrimmedMs": round(self.trailing_trimmed * to_ms, 1),
+        }
@@ -5,6 +5,7 @@
  * Drop-in replacement for ElevenLabsEngine.
  */
 
+import type { LyricLine } from '@livestream-ai/types'
 import type { AudioChunk, AudioChunkCallback } from './elevenlabs'
 
 export interface VibeVoiceConfig {
@@ -115,6 +116,19 @@ export class VibeVoiceEngine {
     }
   }
 
+  /** Ask the server to render upcoming lines into its audio cache while idle. */
+  async prefetch(lines: LyricLine[]): Promise<{ ok: boolean; queued?: number; error?: string }> {
+    const res = await fetch(`${this.config.serverUrl}/prefetch`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ lines }),
+    })
+    if (!res.ok) {
+      return { ok: false, error: `VibeVoice server returned ${res.status}` }
+    }
+    return res.json()
+  }
+
   async speak(text: string): Promise<void> {
     if (!this.isConnected) await this.connect()
 
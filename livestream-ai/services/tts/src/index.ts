@@ -6,6 +6,7 @@
  * Endpoints:
  * - POST /speak        - Speak text immediately
  * - POST /schedule     - Schedule lyrics with timing
+ * - POST /prefetch     - Render upcoming lines ahead of time (vibevoice engine only)
  * - POST /stop         - Stop current speech
  * - GET  /status       - Service status
  *
@@ -28,7 +29,7 @@
 import { WebSocketServer, WebSocket } from 'ws'
 import { ElevenLabsEngine } from './engines/elevenlabs'
 import { VibeVoiceEngine } from './engines/vibevoice'
-import type { LyricLine, TTSSpeakRequest, TTSScheduleRequest } from '@livestream-ai/types'
+import type { LyricLine, TTSSpeakRequest, TTSScheduleRequest, TTSPrefetchRequest } from '@livestream-ai/types'
 
 const PORT = parseInt(process.env.TTS_PORT || '3030')
 const TTS_ENGINE = process.env.TTS_ENGINE || 'elevenlabs'
@@ -64,6 +65,7 @@ interface TTSEngine {
   connect(): Promise<void>
   speak(text: string): Promise<void>
   setOnChunk(callback: (chunk: { audio: string; isFinal?: boolean }) => void): void
+  prefetch?(lines: LyricLine[]): Promise<{ ok: boolean; queued?: number; error?: string }>
 }
 
 let engine: TTSEngine
@@ -189,6 +191,23 @@ const server = Bun.serve({
       return Response.json({ ok: true, scheduled: body.lines.length }, { headers: corsHeaders })
     }
 
+    if (url.pathname === '/prefetch' && req.method === 'POST') {
+      const body = await req.json() as TTSPrefetchRequest
+      if (!engine.prefetch) {
+        return Response.json(
+          { ok: false, error: `Prefetch not supported by the ${engineName} engine` },
+          { status: 501, headers: corsHeaders },
+        )
+      }
+      try {
+        const result = await engine.prefetch(body.lines)
+        return Response.json(result, { status: result.ok ? 200 : 502, headers: corsHeaders })
+      } catch (err) {
+        console.error('[TTS] Prefetch error:', err)
+        return Response.json({ ok: false, error: String(err) }, { status: 502, headers: corsHeaders })
+      }
+    }
+
     if (url.pathname === '/stop' && req.method === 'POST') {
       clearSchedule()
       return Response.json({ ok: true }, { headers: corsHeaders })
@@ -0,0 +1,148 @@
+"""
+Deterministic synthetic TTS engine.
+
+Produces speech-shaped audio (a voiced tone with a syllable envelope) whose
+content, length and chunk timing depend only on the text, voice and
+configuration. It needs no model weights and runs on any CPU, which makes it
+the engine to use for load tests and for exercising caching, batching,
+fan-out and pacing.
+
+Environment:
+    SYNTH_VOICES: Comma-separated voice names (default: synth-alto,synth-bass)
+    SYNTH_CHUNK_MS: Audio per yielded chunk in ms (default: 100)
+    SYNTH_RTF: Generation time per second of audio, 0 = as fast as possible (default: 0.3)
+    SYNTH_FIRST_CHUNK_MS: Extra latency before the first chunk in ms (default: 150)
+    SYNTH_JITTER_MS: Max random (seeded) delay added per chunk in ms (default: 0)
+    SYNTH_MS_PER_CHAR: Audio duration per character of text in ms (default: 65)
+    SYNTH_SILENCE_MS: Near-silence before and after each utterance in ms, like real model output (default: 0)
+"""
+
+import hashlib
+import os
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+from engine import TTSEngine
+from profiling import NULL_TRACE
+
+
+class SyntheticEngine(TTSEngine):
+    """CPU-only engine with a configurable chunk size, chunk rate and latency profile."""
+
+    name = "synthetic"
+    model_name = "synthetic"
+
+    def __init__(
+        self,
+        voices: Optional[List[str]] = None,
+        chunk_ms: float = 100.0,
+        rtf: float = 0.3,
+        first_chunk_ms: float = 150.0,
+        jitter_ms: float = 0.0,
+        ms_per_char: float = 65.0,
+        silence_ms: float = 0.0,
+    ):
+        super().__init__()
+        self.voices = voices or ["synth-alto", "synth-bass"]
+        self.chunk_ms = chunk_ms
+        self.rtf = rtf
+        self.first_chunk_ms = first_chunk_ms
+        self.jitter_ms = jitter_ms
+        self.ms_per_char = ms_per_char
+        self.silence_ms = silence_ms
+        self.default_voice_key = self.voices[0]
+        self._loaded = False
+
+    @classmethod
+    def from_env(cls) -> "SyntheticEngine":
+        voices = [v.strip() for v in os.environ.get("SYNTH_VOICES", "").split(",") if v.strip()]
+        return cls(
+            voices=voices or None,
+            chunk_ms=float(os.environ.get("SYNTH_CHUNK_MS", "100")),
+            rtf=float(os.environ.get("SYNTH_RTF", "0.3")),
+            first_chunk_ms=float(os.environ.get("SYNTH_FIRST_CHUNK_MS", "150")),
+            jitter_ms=float(os.environ.get("SYNTH_JITTER_MS", "0")),
+            ms_per_char=float(os.environ.get("SYNTH_MS_PER_CHAR", "65")),
+            silence_ms=float(os.environ.get("SYNTH_SILENCE_MS", "0")),
+        )
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded
+
+    def load(self) -> None:
+        print(
+            f"[Synthetic] Voices {self.voices}, chunk {self.chunk_ms:.0f}ms, RTF {self.rtf}, "
+            f"first chunk +{self.first_chunk_ms:.0f}ms, jitter {self.jitter_ms:.0f}ms"
+        )
+        self._loaded = True
+
+    def cache_identity(self) -> Dict[str, object]:
+        return {
+            **super().cache_identity(),
+            "voices": self.voices,
+            "msPerChar": self.ms_per_char,
+            "silenceMs": self.silence_ms,
+        }
+
+    def list_voices(self) -> List[str]:
+        return list(self.voices)
+
+    def render(self, text: str, voice_key: Optional[str] = None) -> np.ndarray:
+        """Full utterance audio for ``text``; identical inputs give identical output."""
+        voice = voice_key if voice_key in self.voices else self.default_voice_key
+        seed = self._seed(text, voice)
+        n = max(1, int(len(text.strip()) * self.ms_per_char * self.sample_rate / 1000))
+        t = np.arange(n, dtype=np.float64) / self.sample_rate
+
+        f0 = 110.0 + 110.0 * (self.voices.index(voice) % 4) + (seed % 40)
+        tone = sum(np.sin(2 * np.pi * f0 * k * t) / k for k in (1, 2, 3))
+        syllable_hz = 3.0 + (seed % 3)
+        envelope = np.clip(np.sin(np.pi * syllable_hz * t) ** 2, 0.0, 1.0)
+        fade = np.minimum(1.0, np.minimum(t, t[-1] - t) / 0.01)
+        audio = (0.25 * tone * envelope * fade).astype(np.float32)
+        if self.silence_ms > 0:
+            pad = int(self.silence_ms * self.sample_rate / 1000)
+            hiss = np.random.default_rng(seed).standard_normal(pad).astype(np.float32) * 1e-4
+            audio = np.concatenate((hiss, audio, hiss))
+        return audio
+
+    def stream(
+        self,
+        text: str,
+        cfg_scale: float = 1.5,
+        voice_key: Optional[str] = None,
+        stop_event: Optional[threading.Event] = None,
+        trace=NULL_TRACE,
+    ) -> Iterator[np.ndarray]:
+        if not text.strip():
+            return
+        stop_event = stop_event or threading.Event()
+
+        with trace.span("render", engine=self.name):
+            audio = self.render(text, voice_key)
+        rng = np.random.default_rng(self._seed(text, voice_key or ""))
+        chunk = max(1, int(self.chunk_ms * self.sample_rate / 1000))
+
+        # Pace against a deadline schedule so sleep overshoot does not accumulate
+        deadline = time.monotonic() + self.first_chunk_ms / 1000.0
+        for start in range(0, audio.size, chunk):
+            piece = audio[start:start + chunk]
+            deadline += piece.size / self.sample_rate * self.rtf
+            due = deadline
+            if self.jitter_ms > 0:
+                due += rng.uniform(0.0, self.jitter_ms) / 1000.0
+            delay = due - time.monotonic()
+            if delay > 0 and stop_event.wait(delay):
+                return
+            if stop_event.is_set():
+                return
+            yield piece
+
+    @staticmethod
+    def _seed(text: str, voice: str) -> int:
+        digest = hashlib.blake2b(f"{voice}\0{text}".encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "little")
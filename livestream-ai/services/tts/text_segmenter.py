@@ -0,0 +1,95 @@
+"""
+Cut incrementally arriving text into speakable segments.
+
+LLM replies arrive a few tokens at a time. Synthesizing every fragment gives
+choppy prosody, waiting for the whole reply wastes the time the LLM spends
+generating. ``ProsodicSegmenter`` buffers fragments and releases a segment at
+the first natural boundary that leaves it long enough to sound right:
+
+- sentence ends (``. ! ? …`` followed by whitespace) and line breaks
+- clause breaks (``, ; : —``) once the buffer grows past ``clause_chars``
+  (``first_clause_chars`` for the first segment, so speech starts sooner)
+- the last space before ``max_chars`` when no boundary shows up at all
+
+Terminal punctuation only counts once the next character has arrived, so
+``3.5`` and ``example.com`` are never split mid-token.
+"""
+
+import re
+from typing import List, Optional
+
+SENTENCE_END = re.compile(r"[.!?…]+[\"')\]]*\s+|\n+")
+CLAUSE_END = re.compile(r"[,;:—–]\s+|\s[-–—]\s+")
+ABBREVIATIONS = {"mr", "mrs", "ms", "dr", "st", "vs", "etc", "e.g", "i.e", "jr", "sr", "feat", "ft"}
+
+
+class ProsodicSegmenter:
+    """Buffers streamed text and yields segments at prosodic boundaries."""
+
+    def __init__(
+        self,
+        min_chars: int = 10,
+        first_clause_chars: int = 30,
+        clause_chars: int = 90,
+        max_chars: int = 240,
+    ):
+        self.min_chars = min_chars
+        self.first_clause_chars = first_clause_chars
+        self.clause_chars = clause_chars
+        self.max_chars = max(max_chars, min_chars + 1)
+        self.segments = 0
+        self._buffer = ""
+
+    @property
+    def pending(self) -> str:
+        return self._buffer
+
+    def push(self, fragment: str) -> List[str]:
+        """Add a fragment; return the segments it completed, in order."""
+        self._buffer += fragment
+        segments = []
+        while True:
+            cut = self._find_cut()
+            if cut is None:
+                return segments
+            segment = self._buffer[:cut].strip()
+            self._buffer = self._buffer[cut:].lstrip()
+            if segment:
+                self.segments += 1
+                segments.append(segment)
+
+    def flush(self) -> Optional[str]:
+        """Return whatever is buffered as a final segment (None if only whitespace)."""
+        segment, self._buffer = self._buffer.strip(), ""
+        if not segment:
+            return None
+        self.segments += 1
+        return segment
+
+    def _find_cut(self) -> Optional[int]:
+        buf = self._buffer
+        for match in SENTENCE_END.finditer(buf):
+            if self._is_abbreviation(buf, match.start()):
+                continue
+            if len(buf[:match.start()].strip()) >= self.min_chars:
+                return match.end()
+
+        threshold = self.first_clause_chars if self.segments == 0 else self.clause_chars
+        if len(buf) >= threshold:
+            cuts = [m.end() for m in CLAUSE_END.finditer(buf) if m.start() >= self.min_chars]
+            if cuts:
+                return cuts[-1]
+
+        if len(buf) >= self.max_chars:
+            space = buf.rfind(" ", self.min_chars, self.max_chars)
+            return space + 1 if space > 0 else self.max_chars
+        return None
+
+    @staticmethod
+    def _is_abbreviation(buf: str, end: int) -> bool:
+        if buf[end] != ".":
+            return False
+        start = end
+        while start > 0 and (buf[start - 1].isalpha() or buf[start - 1] == "."):
+            start -= 1
+        return buf[start:end].lower() in ABBREVIATIONS
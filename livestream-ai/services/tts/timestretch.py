@@ -0,0 +1,204 @@
+"""
+Streaming time-scale modification (WSOLA) to fit lines into lyric windows.
+
+A scheduled lyric line has a fixed window before the next one starts; when
+the synthesized audio runs longer, lines overlap or fall behind. Instead of
+re-synthesizing, ``TimeStretcher`` changes the tempo without changing pitch:
+
+- windowed frames of ``frame_ms`` are overlap-added every ``frame_ms / 2``
+  of output, while the read position advances ``rate`` times as fast
+  (``rate > 1`` is faster/shorter, ``rate < 1`` slower/longer)
+- each frame is taken from within ``search_ms`` of its nominal position,
+  where it best continues the previous frame (cross-correlation computed as
+  one matrix-vector product per frame), so waveforms line up and no phasey
+  artifacts appear
+
+``DurationFitter`` drives the rate towards a target duration while audio is
+still arriving. The total length is not known until the model finishes, so
+it starts from an estimate and re-aims the remaining audio at the remaining
+output time after every chunk, never faster than ``max_rate``. Such lines are
+only ever sped up: slowing down commits to a longer output before the real
+length is known, and a line that runs long could then be pushed past a window
+it would have fit unstretched. With ``exact=True`` (audio replayed from the
+cache) the length is known up front, so the line is also slowed down, no
+slower than ``min_rate``, to fill a longer window.
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+OVERRUN_MARGIN = 0.15
+
+
+class TimeStretcher:
+    """WSOLA over a stream of float32 chunks; ``rate`` may change between pushes."""
+
+    def __init__(self, sample_rate: int, rate: float = 1.0, frame_ms: float = 20.0, search_ms: float = 8.0):
+        self.sample_rate = sample_rate
+        self.rate = rate
+        self.hop = max(1, int(sample_rate * frame_ms / 2000))  # synthesis hop, half a frame
+        self.frame = 2 * self.hop
+        self.search = int(sample_rate * search_ms / 1000)
+        # Periodic Hann: frames at half-frame spacing sum to exactly 1
+        self._window = (0.5 - 0.5 * np.cos(2 * np.pi * np.arange(self.frame) / self.frame)).astype(np.float32)
+        # The stream starts as if a frame had been read just before it, over
+        # silence, so the first real frame needs no special case
+        self._input = np.zeros(self.hop, dtype=np.float32)
+        self._base = -self.hop  # absolute input index of self._input[0]
+        self._prev = -2 * self.hop  # where the previous frame was read from
+        self._nominal = float(-self.hop)  # where the next frame should be read from
+        self._overlap = np.zeros(self.hop, dtype=np.float32)
+        self._skip = self.hop  # output that belongs to the silence before the stream
+        self.consumed = 0  # input samples received
+        self.emitted = 0  # output samples returned
+
+    @property
+    def position(self) -> float:
+        """Input position the emitted output has reached."""
+        return max(0.0, self._nominal + self.hop * (1.0 - self.rate))
+
+    def push(self, chunk: np.ndarray) -> np.ndarray:
+        """Feed audio; return the output that is final so far."""
+        chunk = np.asarray(chunk, dtype=np.float32)
+        self.consumed += chunk.size
+        self._input = np.concatenate((self._input, chunk))
+        return self._run()
+
+    def flush(self) -> np.ndarray:
+        """End of stream: stretch what is left and return the remainder."""
+        expected = self.emitted + max(0, round((self.consumed - self.position) / self.rate))
+        self._input = np.concatenate((self._input, np.zeros(2 * (self.frame + self.search), dtype=np.float32)))
+        out = [self._run(limit=expected), self._emit(self._overlap, expected)]
+        out.append(self._emit(np.zeros(expected - self.emitted, dtype=np.float32)))
+        return np.concatenate(out)
+
+    def _run(self, limit: Optional[int] = None) -> np.ndarray:
+        out = []
+        end = self._base + self._input.size
+        while limit is None or self.emitted < limit:
+            start = int(round(self._nominal))
+            if self.rate == 1.0 and start == self._nominal:
+                # Nothing to stretch: copy whole hops through unchanged, and
+                # wait for more input rather than blend a frame onto itself
+                hops = (end - self.search - self.frame - start) // self.hop
+                if hops < 1:
+                    break
+                out.append(self._passthrough(start, hops, limit))
+                continue
+            lo = max(self._base, start - self.search)
+            hi = start + self.search
+            if max(hi, self._prev + self.hop) + self.frame > end:
+                break
+            pos = self._best_offset(lo, hi)
+            frame = self._input[pos - self._base:pos - self._base + self.frame] * self._window
+            ready = self._overlap + frame[:self.hop]
+            self._overlap = frame[self.hop:]
+            out.append(self._emit(ready, limit))
+            self._prev = pos
+            self._nominal += self.hop * self.rate
+            self._drop_consumed()
+        return np.concatenate(out) if out else np.zeros(0, dtype=np.float32)
+
+    def _best_offset(self, lo: int, hi: int) -> int:
+        """Read position in ``[lo, hi]`` whose frame best continues the previous one."""
+        natural = self._prev + self.hop - self._base
+        template = self._input[natural:natural + self.frame]
+        region = self._input[lo - self._base:hi - self._base + self.frame]
+        # Normalized, so louder candidates do not win just for being loud
+        energy = np.cumsum(np.square(region, dtype=np.float64))
+        energy = energy[self.frame - 1:] - np.concatenate(([0.0], energy[:-self.frame]))
+        scores = (sliding_window_view(region, self.frame) @ template) / np.sqrt(np.maximum(energy, 1e-9))
+        return lo + int(np.argmax(scores))
+
+    def _passthrough(self, start: int, hops: int, limit: Optional[int]) -> np.ndarray:
+        """Emit ``hops`` hops of input as-is, leaving the state a frame read would have."""
+        i = start - self._base
+        stop = i + hops * self.hop
+        ready = self._input[i:stop].copy()
+        ready[:self.hop] += self._overlap - self._input[i:i + self.hop] * self._window[self.hop:]
+        self._overlap = self._input[stop:stop + self.hop] * self._window[self.hop:]
+        self._prev = start + (hops - 1) * self.hop
+        self._nominal = float(start + hops * self.hop)
+        self._drop_consumed()
+        return self._emit(ready, limit)
+
+    def _emit(self, audio: np.ndarray, limit: Optional[int] = None) -> np.ndarray:
+        if self._skip:
+            skipped = min(self._skip, audio.size)
+            audio, self._skip = audio[skipped:], self._skip - skipped
+        if limit is not None:
+            audio = audio[:max(0, limit - self.emitted)]
+        self.emitted += audio.size
+        return audio
+
+    def _drop_consumed(self) -> None:
+        keep_from = min(int(self._nominal) - self.search, self._prev + self.hop)
+        drop = keep_from - self._base
+        if drop > 4 * self.frame:
+            self._input = self._input[drop:]
+            self._base += drop
+
+
+class DurationFitter:
+    """Stretches one utterance towards ``target_s``, re-aiming as audio arrives."""
+
+    def __init__(
+        self,
+        sample_rate: int,
+        target_s: float,
+        estimate_s: float,
+        exact: bool = False,
+        min_rate: float = 0.85,
+        max_rate: float = 1.3,
+        tolerance: float = 0.03,
+    ):
+        self.sample_rate = sample_rate
+        self.target = max(1, int(target_s * sample_rate))
+        self.estimate = max(1, int(estimate_s * sample_rate))
+        self.exact = exact
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.tolerance = tolerance
+        self.stretcher = TimeStretcher(sample_rate)
+        self._aim()
+
+    def push(self, chunk: np.ndarray) -> np.ndarray:
+        out = self.stretcher.push(chunk)
+        self._aim()
+        return out
+
+    def flush(self) -> np.ndarray:
+        self.estimate = self.stretcher.consumed  # the real length is known now
+        self._aim(final=True)
+        return self.stretcher.flush()
+
+    def _aim(self, final: bool = False) -> None:
+        s = self.stretcher
+        known = final or self.exact
+        total = self.estimate
+        if not known and s.consumed >= self.estimate:
+            # Past the estimate the line is running long; assume some more is coming
+            total = s.consumed * (1 + OVERRUN_MARGIN)
+        remaining_in = total - s.position
+        remaining_out = self.target - s.emitted
+        wanted = remaining_in / remaining_out if remaining_out > 0 else self.max_rate
+        # Without the exact length, slowing down could stretch a line that runs
+        # long past its window; only a known length may be slowed
+        min_rate = self.min_rate if self.exact else 1.0
+        rate = min(self.max_rate, max(min_rate, wanted))
+        if abs(rate - 1.0) < self.tolerance:
+            rate = 1.0  # close enough: leave the audio untouched
+        s.rate = rate
+
+    def stats(self) -> Dict[str, float]:
+        to_ms = 1000.0 / self.sample_rate
+        s = self.stretcher
+        return {
+            "targetMs": round(self.target * to_ms),
+            "naturalMs": round(s.consumed * to_ms),
+            "outputMs": round(s.emitted * to_ms),
+            "rate": round(s.consumed / s.emitted, 3) if s.emitted else 1.0,
+            "fitted": abs(s.emitted - self.target) <= self.tolerance * self.target,
+        }
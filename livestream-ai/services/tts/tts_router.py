@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+Router in front of several VibeVoice TTS server instances.
+
+Speaks the same HTTP/WebSocket API as ``vibevoice_server.py``, so the
+orchestrator's ``TTS_URL`` can point here instead of at a single process.
+
+- Polls ``GET /load`` on every instance (queue depth, active generations,
+  measured RTF, warm voices).
+- Sends each ``/speak`` to the least-loaded ready instance that already has
+  the requested voice warm, falling back to any ready instance.
+- ``/schedule`` and ``/stop`` time lyric lines here and dispatch each line as
+  a ``/speak`` when it is due, with ``target_ms`` set to the time until the
+  next line so instances time-stretch lines that would overrun it.
+- ``/prefetch`` goes to the instance ``/speak`` would pick for its voice; lines
+  it renders are hits on any instance sharing its audio cache directory.
+- ``/ws/audio?room=X`` merges that room's broadcast of all instances onto one socket;
+  upstream sockets are only held open while someone is listening, so the
+  instances' listener checks keep working.
+
+Usage:
+    python vibevoice_server.py --engine synthetic --port 3031 &
+    python vibevoice_server.py --engine synthetic --port 3032 &
+    python tts_router.py --port 3030 --instances http://localhost:3031,http://localhost:3032
+    python loadtest.py --url http://localhost:3030
+
+Environment:
+    VIBEVOICE_INSTANCES: Comma-separated instance base URLs
+    VIBEVOICE_ROUTER_POLL_MS: Load report poll interval in ms (default: 500)
+    TTS_LEAD_TIME_MS: How early scheduled lines are sent, as in the TS service (default: 400)
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set
+
+import httpx
+import uvicorn
+import websockets
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel
+
+SAMPLE_RATE = 24_000
+DEFAULT_ROOM = "main"
+ROOM_PATTERN = r"^[A-Za-z0-9_-]{1,64}$"
+POLL_S = float(os.environ.get("VIBEVOICE_ROUTER_POLL_MS", "500")) / 1000.0
+LEAD_TIME_MS = int(os.environ.get("TTS_LEAD_TIME_MS", "400"))
+
+app = FastAPI(title="VibeVoice TTS Router")
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+
+@dataclass
+class Instance:
+    url: str
+    load: Dict[str, Any] = field(default_factory=dict)
+    healthy: bool = False
+    last_poll: float = 0.0
+    error: Optional[str] = None
+    inflight: int = 0  # dispatched by us and not answered yet, covers the gap between polls
+    dispatched: int = 0
+
+    @property
+    def ready(self) -> bool:
+        return self.healthy and bool(self.load.get("ready"))
+
+    def score(self) -> tuple:
+        slots = max(1, self.load.get("slots", 1))
+        backlog = self.load.get("queueDepth", 0) + self.load.get("activeGenerations", 0) + self.inflight
+        return (backlog / slots, self.load.get("rtf") or 0.0)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "ready": self.ready,
+            "load": self.load,
+            "inflight": self.inflight,
+            "dispatched": self.dispatched,
+            "error": self.error,
+        }
+
+
+class LineSchedule(BaseModel):
+    lines: List[Dict[str, Any]]
+    startedAt: float
+    room: str = DEFAULT_ROOM
+
+
+instances: List[Instance] = []
+http: Optional[httpx.AsyncClient] = None
+consumers: Dict[WebSocket, tuple] = {}  # client -> (room, sample rate)
+upstreams: Dict[tuple, asyncio.Task] = {}  # (instance url, (room, rate)) -> relay task
+scheduled: List[asyncio.Task] = []
+
+
+def pick_instance(voice: Optional[str]) -> Optional[Instance]:
+    ready = [i for i in instances if i.ready]
+    if voice:
+        warm = [i for i in ready if voice in i.load.get("warmVoices", [])]
+        ready = warm or [i for i in ready if voice in i.load.get("voices", [])]
+    return min(ready, key=Instance.score, default=None)
+
+
+async def poll_instance(instance: Instance) -> None:
+    while True:
+        try:
+            res = await http.get(f"{instance.url}/load", timeout=max(1.0, POLL_S * 2))
+            res.raise_for_status()
+            instance.load, instance.healthy, instance.error = res.json(), True, None
+        except Exception as exc:
+            if instance.healthy:
+                print(f"[Router] {instance.url} unavailable: {exc!r}")
+            instance.healthy, instance.error = False, repr(exc)
+        instance.last_poll = time.monotonic()
+        await asyncio.sleep(POLL_S)
+
+
+@app.on_event("startup")
+async def start_polling():
+    global http
+    http = httpx.AsyncClient(timeout=None)
+    for instance in instances:
+        asyncio.create_task(poll_instance(instance))
+
+
+@app.on_event("shutdown")
+async def stop_polling():
+    for task in scheduled + list(upstreams.values()):
+        task.cancel()
+    await http.aclose()
+
+
+async def dispatch(body: Dict[str, Any]) -> Response:
+    instance = pick_instance(body.get("voice"))
+    if instance is None:
+        return JSONResponse({"ok": False, "error": "No ready TTS instance"}, status_code=503)
+
+    instance.inflight += 1
+    instance.dispatched += 1
+    if body.get("stream"):
+        return await relay_stream(instance, body)
+    try:
+        res = await http.post(f"{instance.url}/speak", json=body)
+    except httpx.HTTPError as exc:
+        return upstream_failed(instance, exc)
+    finally:
+        instance.inflight -= 1
+
+    try:
+        payload = res.json()
+    except ValueError:
+        return Response(res.content, status_code=res.status_code)
+    if isinstance(payload, dict):
+        payload["instance"] = instance.url
+    return JSONResponse(payload, status_code=res.status_code)
+
+
+async def relay_stream(instance: Instance, body: Dict[str, Any]) -> Response:
+    """Pass a ``"stream": true`` response body through as it arrives."""
+    try:
+        upstream = await http.send(http.build_request("POST", f"{instance.url}/speak", json=body), stream=True)
+    except httpx.HTTPError as exc:
+        instance.inflight -= 1
+        return upstream_failed(instance, exc)
+
+    async def relay():
+        try:
+            async for chunk in upstream.aiter_raw():
+                yield chunk
+        finally:
+            await upstream.aclose()
+            instance.inflight -= 1
+
+    return StreamingResponse(
+        relay(),
+        status_code=upstream.status_code,
+        media_type=upstream.headers.get("content-type"),
+    )
+
+
+def upstream_failed(instance: Instance, exc: Exception) -> Response:
+    instance.healthy, instance.error = False, repr(exc)
+    return JSONResponse({"ok": False, "error": f"{instance.url}: {exc!r}"}, status_code=502)
+
+
+@app.post("/speak")
+async def speak(request: Request):
+    return await dispatch(await request.json())
+
+
+@app.post("/prefetch")
+async def prefetch(request: Request):
+    body = await request.json()
+    instance = pick_instance(body.get("voice"))
+    if instance is None:
+        return JSONResponse({"ok": False, "error": "No ready TTS instance"}, status_code=503)
+    try:
+        res = await http.post(f"{instance.url}/prefetch", json=body)
+    except httpx.HTTPError as exc:
+        return upstream_failed(instance, exc)
+    return Response(res.content, status_code=res.status_code, media_type=res.headers.get("content-type"))
+
+
+@app.post("/schedule")
+async def schedule(body: LineSchedule):
+    """Speak each line ``TTS_LEAD_TIME_MS`` before its ``startMs`` relative to ``startedAt`` (epoch ms)."""
+    clear_schedule()
+    now_ms = time.time() * 1000
+    count = 0
+    for i, line in enumerate(body.lines):
+        text = str(line.get("text", "")).strip()
+        delay = (body.startedAt + line.get("startMs", 0) - LEAD_TIME_MS - now_ms) / 1000.0
+        if not text or delay < 0:
+            continue
+        payload = {"text": text, "id": f"line-{line.get('index', count)}", "priority": 1, "room": body.room}
+        window = line_window(body.lines, i)
+        if window:
+            payload["target_ms"] = window
+        scheduled.append(asyncio.create_task(speak_at(delay, payload)))
+        count += 1
+    print(f"[Router] Scheduled {count} of {len(body.lines)} lines (lead time: {LEAD_TIME_MS}ms)")
+    return {"ok": True, "scheduled": count}
+
+
+def line_window(lines: List[Dict[str, Any]], i: int) -> Optional[int]:
+    """Time a line has before the next one is spoken (its own length for the last line)."""
+    start = lines[i].get("startMs", 0)
+    if i + 1 < len(lines) and "startMs" in lines[i + 1]:
+        window = lines[i + 1]["startMs"] - start
+    elif "endMs" in lines[i]:
+        window = lines[i]["endMs"] - start
+    else:
+        return None
+    return int(window) if window > 0 else None
+
+
+async def speak_at(delay: float, payload: Dict[str, Any]) -> None:
+    await asyncio.sleep(delay)
+    res = await dispatch(payload)
+    if res.status_code >= 400:
+        print(f"[Router] Scheduled line {payload['id']} failed: HTTP {res.status_code}")
+
+
+def clear_schedule() -> None:
+    for task in scheduled:
+        task.cancel()
+    scheduled.clear()
+
+
+@app.post("/stop")
+async def stop():
+    clear_schedule()
+    return {"ok": True}
+
+
+@app.get("/status")
+async def status():
+    ready = [i for i in instances if i.ready]
+    return {
+        "ok": bool(ready),
+        "engine": "router",
+        "instances": [i.to_dict() for i in instances],
+        "listeners": len(consumers),
+        "scheduled": sum(1 for t in scheduled if not t.done()),
+    }
+
+
+@app.get("/voices")
+async def voices():
+    names: Set[str] = set()
+    for instance in instances:
+        if instance.ready:
+            names.update(instance.load.get("voices", []))
+    return {"voices": sorted(names)}
+
+
+async def relay_upstream(instance: Instance, channel: tuple) -> None:
+    """Forward one instance's broadcast for a (room, rate) channel to our listeners on it."""
+    room, rate = channel
+    url = instance.url.replace("http", "ws", 1) + f"/ws/audio?rate={rate}&room={room}"
+    while channel in consumers.values():
+        try:
+            async with websockets.connect(url, max_size=None) as ws:
+                async for raw in ws:
+                    targets = [c for c, ch in consumers.items() if ch == channel]
+                    if not targets:
+                        break
+                    if len(raw) < 64 and json.loads(raw).get("type") == "ping":
+                        continue  # instances ping their listeners; we ping ours
+                    await asyncio.gather(*(send_or_drop(c, raw) for c in targets))
+        except Exception:
+            await asyncio.sleep(1.0)  # instance down or restarting
+    upstreams.pop((instance.url, channel), None)
+
+
+async def send_or_drop(client: WebSocket, raw: str) -> None:
+    try:
+        await client.send_text(raw)
+    except Exception:
+        consumers.pop(client, None)
+
+
+def ensure_upstreams(channel: tuple) -> None:
+    for instance in instances:
+        key = (instance.url, channel)
+        task = upstreams.get(key)
+        if task is None or task.done():
+            upstreams[key] = asyncio.create_task(relay_upstream(instance, channel))
+
+
+@app.websocket("/ws/audio")
+async def websocket_audio(websocket: WebSocket):
+    """Audio from every instance, merged; messages are passed through unchanged."""
+    try:
+        rate = int(websocket.query_params.get("rate", SAMPLE_RATE))
+    except ValueError:
+        rate = SAMPLE_RATE
+    room = websocket.query_params.get("room", DEFAULT_ROOM)
+    if not re.match(ROOM_PATTERN, room):
+        await websocket.close(code=1008, reason=f"Invalid room name: {room!r}")
+        return
+
+    await websocket.accept()
+    consumers[websocket] = (room, rate)
+    ensure_upstreams((room, rate))
+    print(f"[Router] Audio client connected to {room!r} ({rate} Hz)")
+    try:
+        while True:
+            try:
+                await asyncio.wait_for(websocket.receive_text(), timeout=30)
+            except asyncio.TimeoutError:
+                await websocket.send_json({"type": "ping"})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        consumers.pop(websocket, None)
+        print("[Router] Audio client disconnected")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-aware router for VibeVoice TTS instances")
+    parser.add_argument("--port", type=int, default=3030, help="Router port")
+    parser.add_argument(
+        "--instances",
+        default=os.environ.get("VIBEVOICE_INSTANCES", ""),
+        help="Comma-separated instance base URLs",
+    )
+    args = parser.parse_args()
+
+    urls = [u.strip().rstrip("/") for u in args.instances.split(",") if u.strip()]
+    if not urls:
+        parser.error("no instances given (--instances or VIBEVOICE_INSTANCES)")
+    instances.extend(Instance(url) for url in urls)
+
+    print(f"[Router] Routing to {len(urls)} instance(s): {', '.join(urls)}")
+    print(f"[Router] HTTP server on http://localhost:{args.port}")
+    uvicorn.run(app, host="0.0.0.0", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
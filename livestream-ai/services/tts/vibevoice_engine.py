@@ -0,0 +1,608 @@
+"""
+VibeVoice engine: Microsoft's VibeVoice-Realtime-0.5B behind the ``TTSEngine`` interface.
+
+Environment:
+    VOICE_PRESET: Default voice preset name
+    VIBEVOICE_INPUT_CACHE_MB: Memory budget for prepared model inputs (default: 64, 0 disables)
+    VIBEVOICE_MODEL_REVISION: Model revision, part of the rendered-audio cache key (default: unset)
+"""
+
+import os
+import copy
+import time
+import threading
+import functools
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional, Dict, Any, Iterator, List
+
+import numpy as np
+
+from caches import ByteBudgetLRU
+from engine import SAMPLE_RATE, TTSEngine
+from memory import GenerationRecord, nbytes, process_rss_bytes
+from profiling import NULL_TRACE
+from workers import GenerationJob, WorkerPool
+
+if TYPE_CHECKING:
+    from vibevoice.modular.modeling_vibevoice_streaming_inference import (
+        VibeVoiceStreamingForConditionalGenerationInference,
+    )
+    from vibevoice.processor.vibevoice_streaming_processor import VibeVoiceStreamingProcessor
+    from vibevoice.modular.streamer import AudioStreamer
+
+# torch and vibevoice take seconds to import; bound by _import_runtime() in load()
+torch = None
+VibeVoiceStreamingForConditionalGenerationInference = None
+VibeVoiceStreamingProcessor = None
+AudioStreamer = None
+
+BASE = Path(__file__).parent
+INPUT_CACHE_MB = float(os.environ.get("VIBEVOICE_INPUT_CACHE_MB", "64"))
+
+
+def _import_runtime() -> None:
+    global torch, VibeVoiceStreamingForConditionalGenerationInference
+    global VibeVoiceStreamingProcessor, AudioStreamer
+    import torch as _torch
+    from vibevoice.modular.modeling_vibevoice_streaming_inference import (
+        VibeVoiceStreamingForConditionalGenerationInference as _Model,
+    )
+    from vibevoice.processor.vibevoice_streaming_processor import (
+        VibeVoiceStreamingProcessor as _Processor,
+    )
+    from vibevoice.modular.streamer import AudioStreamer as _Streamer
+
+    torch = _torch
+    VibeVoiceStreamingForConditionalGenerationInference = _Model
+    VibeVoiceStreamingProcessor = _Processor
+    AudioStreamer = _Streamer
+
+
+class StreamingTTSService(TTSEngine):
+    """VibeVoice TTS Service with streaming support."""
+
+    name = "vibevoice"
+
+    def __init__(self, model_path: str, device: str = "cuda", inference_steps: int = 5):
+        super().__init__()
+        self.model_path = model_path
+        self.model_name = model_path
+        self.inference_steps = inference_steps
+        self.sample_rate = SAMPLE_RATE
+
+        self.processor: Optional["VibeVoiceStreamingProcessor"] = None
+        self.model: Optional["VibeVoiceStreamingForConditionalGenerationInference"] = None
+        self.voice_presets: Dict[str, Path] = {}
+        self.default_voice_key: Optional[str] = None
+        self._voice_cache: Dict[str, Any] = {}
+        self._voice_signatures: Dict[str, tuple] = {}
+        self._voice_reload_lock = threading.RLock()
+        self._voice_watcher: Optional[threading.Thread] = None
+        self._voice_watcher_stop = threading.Event()
+        self._input_cache = ByteBudgetLRU(int(INPUT_CACHE_MB * 1024 * 1024), self._inputs_nbytes)
+        self._generations: Dict[int, GenerationRecord] = {}
+        self._generation_ids = itertools.count(1)
+        self._voice_nbytes: Dict[tuple, int] = {}
+        self._watchdog: Optional[threading.Thread] = None
+        self._workers: Optional[WorkerPool] = None
+        self.generation_deadline = 120.0
+        self.device = device
+        self._torch_device = None
+
+    def load(self) -> None:
+        """Load processor, model and default voice concurrently.
+
+        The three loads are independent and each spends most of its time in
+        I/O or native code, so they overlap well on a thread pool. ``model`` is
+        assigned last: ``is_loaded`` flips only when everything is ready.
+        """
+        with self.startup.phase("imports"):
+            _import_runtime()
+
+        if self.device == "mps" and not torch.backends.mps.is_available():
+            print("[VibeVoice] Warning: MPS not available. Falling back to CPU.")
+            self.device = "cpu"
+        self._torch_device = torch.device(self.device)
+
+        with ThreadPoolExecutor(max_workers=3, thread_name_prefix="startup") as pool:
+            processor = pool.submit(self._load_processor)
+            model = pool.submit(self._load_model)
+            voices = pool.submit(self._load_default_voice)
+            # Surface the first failure, but let the other loads finish first
+            results = [f.exception() for f in (processor, model, voices)]
+            for exc in results:
+                if exc is not None:
+                    raise exc
+
+        self.processor = processor.result()
+        self.model = model.result()
+        print(f"[VibeVoice] Model loaded. Default voice: {self.default_voice_key}")
+
+    def _load_processor(self) -> "VibeVoiceStreamingProcessor":
+        with self.startup.phase("processor"):
+            print(f"[VibeVoice] Loading processor from {self.model_path}")
+            return VibeVoiceStreamingProcessor.from_pretrained(self.model_path)
+
+    def _load_model(self) -> "VibeVoiceStreamingForConditionalGenerationInference":
+        # Decide dtype & attention based on device
+        if self.device == "mps":
+            load_dtype = torch.float32
+            device_map = None
+            attn_impl = "sdpa"
+        elif self.device == "cuda":
+            load_dtype = torch.bfloat16
+            device_map = "cuda"
+            attn_impl = "sdpa"  # Use SDPA for compatibility (flash_attention_2 requires separate install)
+        else:
+            load_dtype = torch.float32
+            device_map = "cpu"
+            attn_impl = "sdpa"
+
+        with self.startup.phase("model"):
+            print(f"[VibeVoice] Loading model on {device_map}, dtype={load_dtype}, attn={attn_impl}")
+            model = VibeVoiceStreamingForConditionalGenerationInference.from_pretrained(
+                self.model_path,
+                torch_dtype=load_dtype,
+                device_map=device_map,
+                attn_implementation=attn_impl,
+            )
+
+            if self.device == "mps":
+                model.to("mps")
+
+            model.eval()
+
+            # Configure noise scheduler
+            model.model.noise_scheduler = model.model.noise_scheduler.from_config(
+                model.model.noise_scheduler.config,
+                algorithm_type="sde-dpmsolver++",
+                beta_schedule="squaredcos_cap_v2",
+            )
+            model.set_ddpm_inference_steps(num_steps=self.inference_steps)
+        return model
+
+    def _load_default_voice(self) -> None:
+        with self.startup.phase("voice"):
+            self.voice_presets = self._load_voice_presets()
+            self._voice_signatures = {key: self._voice_signature(path) for key, path in self.voice_presets.items()}
+            self.default_voice_key = self._determine_voice_key(os.environ.get("VOICE_PRESET"))
+            self._ensure_voice_cached(self.default_voice_key)
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.model is not None
+
+    def list_voices(self) -> List[str]:
+        return list(self.voice_presets)
+
+    def cache_identity(self) -> Dict[str, Any]:
+        return {
+            **super().cache_identity(),
+            "revision": os.environ.get("VIBEVOICE_MODEL_REVISION", ""),
+            "inferenceSteps": self.inference_steps,
+            "device": self.device,
+        }
+
+    def voice_revision(self, voice_key: str) -> str:
+        signature = self._voice_signatures.get(voice_key)
+        return "" if signature is None else "-".join(map(str, signature))
+
+    def prepare_voice(self, voice_key: str) -> None:
+        self._ensure_voice_cached(self.resolve_voice(voice_key))
+
+    def voice_info(self) -> Dict[str, Any]:
+        return {
+            "voices": self.list_voices(),
+            "default": self.default_voice_key,
+            "cached": list(self._voice_cache),
+            "inputCache": self._input_cache.stats(),
+        }
+
+    def warm_voices(self) -> List[str]:
+        return list(self._voice_cache)
+
+    def _load_voice_presets(self) -> Dict[str, Path]:
+        """Load voice preset files from voices directory."""
+        voices_dir = BASE / "voices"
+        if not voices_dir.exists():
+            raise RuntimeError(f"Voices directory not found: {voices_dir}")
+
+        presets: Dict[str, Path] = {}
+        for pt_path in voices_dir.glob("*.pt"):
+            presets[pt_path.stem] = pt_path
+
+        if not presets:
+            raise RuntimeError(f"No voice preset (.pt) files found in {voices_dir}")
+
+        print(f"[VibeVoice] Found {len(presets)} voice presets: {list(presets.keys())}")
+        return dict(sorted(presets.items()))
+
+    @staticmethod
+    def _voice_signature(path: Path) -> tuple:
+        stat = path.stat()
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _scan_voice_files(self) -> Dict[str, Path]:
+        voices_dir = BASE / "voices"
+        if not voices_dir.exists():
+            return {}
+        return {pt_path.stem: pt_path for pt_path in sorted(voices_dir.glob("*.pt"))}
+
+    def reload_voices(self) -> Dict[str, list]:
+        """Rescan the voices directory and hot-swap added, changed or removed presets.
+
+        Presets are loaded on the calling thread before anything is swapped, and
+        the preset/cache dicts are replaced wholesale, so generations already
+        running keep the prefill state they started with.
+        """
+        with self._voice_reload_lock:
+            found = self._scan_voice_files()
+            if not found:
+                print("[VibeVoice] Warning: no voice presets found on reload, keeping current set")
+                return {"added": [], "changed": [], "removed": []}
+
+            signatures = {}
+            for key, path in found.items():
+                try:
+                    signatures[key] = self._voice_signature(path)
+                except FileNotFoundError:
+                    continue
+
+            added = sorted(k for k in signatures if k not in self._voice_signatures)
+            removed = sorted(k for k in self._voice_signatures if k not in signatures)
+            changed = sorted(
+                k for k in signatures
+                if k in self._voice_signatures and signatures[k] != self._voice_signatures[k]
+            )
+            if not (added or removed or changed):
+                return {"added": [], "changed": [], "removed": []}
+
+            loaded: Dict[str, Any] = {}
+            for key in added + changed:
+                try:
+                    loaded[key] = self._load_voice_file(key, found[key])
+                except Exception as exc:
+                    # Half-written file: leave it for the next scan
+                    print(f"[VibeVoice] Failed to load voice preset {key}: {exc}")
+                    signatures.pop(key, None)
+                    if key in self._voice_signatures:
+                        signatures[key] = self._voice_signatures[key]
+                        found[key] = self.voice_presets[key]
+                    else:
+                        found.pop(key)
+
+            cache = {k: v for k, v in self._voice_cache.items() if k in found and k not in loaded}
+            cache.update(loaded)
+
+            # Swap references; readers see either the old or the new set, never a mix
+            self.voice_presets = dict(sorted((k, found[k]) for k in signatures))
+            self._voice_cache = cache
+            self._voice_signatures = signatures
+            stale = set(removed) | set(loaded)
+            self._input_cache.discard_where(lambda cache_key: cache_key[1] in stale)
+            if self.default_voice_key not in self.voice_presets:
+                self.default_voice_key = self._determine_voice_key(os.environ.get("VOICE_PRESET"))
+                self._ensure_voice_cached(self.default_voice_key)
+
+            diff = {
+                "added": [k for k in added if k in loaded],
+                "changed": [k for k in changed if k in loaded],
+                "removed": removed,
+            }
+            print(f"[VibeVoice] Voice presets reloaded: {diff}")
+            return diff
+
+    def start_voice_watcher(self, interval: float) -> None:
+        """Poll the voices directory in the background and reload on change."""
+        if interval <= 0 or self._voice_watcher is not None:
+            return
+
+        def watch():
+            while not self._voice_watcher_stop.wait(interval):
+                try:
+                    self.reload_voices()
+                except Exception as exc:
+                    print(f"[VibeVoice] Voice watcher error: {exc}")
+
+        self._voice_watcher = threading.Thread(target=watch, name="voice-watcher", daemon=True)
+        self._voice_watcher.start()
+
+    def stop_voice_watcher(self) -> None:
+        self._voice_watcher_stop.set()
+
+    def _determine_voice_key(self, name: Optional[str]) -> str:
+        """Determine which voice to use."""
+        if name and name in self.voice_presets:
+            return name
+
+        # Try defaults
+        for default in ["en-Carter_man", "en-WHTest_man"]:
+            if default in self.voice_presets:
+                return default
+
+        # Fallback to first available
+        return next(iter(self.voice_presets))
+
+    def _ensure_voice_cached(self, key: str) -> Any:
+        """Load and cache voice preset."""
+        if key not in self.voice_presets:
+            raise RuntimeError(f"Voice preset {key!r} not found")
+
+        cache = self._voice_cache
+        if key not in cache:
+            with self._voice_reload_lock:
+                cache = self._voice_cache
+                if key not in cache:
+                    prefilled_outputs = self._load_voice_file(key, self.voice_presets[key])
+                    # Copy-on-write so readers never see a half-updated dict
+                    cache = {**cache, key: prefilled_outputs}
+                    self._voice_cache = cache
+
+        return cache[key]
+
+    def _load_voice_file(self, key: str, preset_path: Path) -> Any:
+        print(f"[VibeVoice] Loading voice preset: {key}")
+        return torch.load(
+            preset_path,
+            map_location=self._torch_device,
+            weights_only=False,
+        )
+
+    @staticmethod
+    def _inputs_nbytes(inputs: Dict[str, Any]) -> int:
+        return sum(
+            value.element_size() * value.nelement()
+            for value in inputs.values()
+            if torch.is_tensor(value)
+        )
+
+    def _prepare_inputs(self, text: str, prefilled_outputs: Any, voice_key: Optional[str] = None):
+        """Prepare model inputs from text and voice preset.
+
+        Results stay on the device in a byte-bounded LRU keyed by normalized
+        text and voice, so repeated lines skip the processor entirely. The
+        tensors are shared between generations and must be treated as read-only.
+        """
+        text = " ".join(text.split())
+        cache_key = (text, voice_key)
+        if voice_key is not None and self._input_cache.max_bytes > 0:
+            cached = self._input_cache.get(cache_key)
+            if cached is not None:
+                return dict(cached)
+
+        processed = self.processor.process_input_with_cached_prompt(
+            text=text,
+            cached_prompt=prefilled_outputs,
+            padding=True,
+            return_tensors="pt",
+            return_attention_mask=True,
+        )
+
+        inputs = {
+            key: value.to(self._torch_device) if hasattr(value, "to") else value
+            for key, value in processed.items()
+        }
+        if voice_key is not None and self._input_cache.max_bytes > 0:
+            self._input_cache.put(cache_key, inputs)
+        return dict(inputs)
+
+    def _run_generation(
+        self,
+        inputs,
+        audio_streamer: "AudioStreamer",
+        errors: list,
+        cfg_scale: float,
+        prefilled_outputs,
+        stop_event: threading.Event,
+        trace=NULL_TRACE,
+        generation_id: Optional[int] = None,
+    ) -> None:
+        """Run one generation; called on a generation worker thread."""
+        record = self._generations.get(generation_id)
+        if record is not None:
+            record.thread = threading.current_thread()
+        try:
+            if stop_event.is_set():
+                audio_streamer.end()
+                return
+            with trace.span("deepcopy_prefill"):
+                all_prefilled_outputs = copy.deepcopy(prefilled_outputs)
+
+            torch_profiler = nullcontext()
+            if trace.torch_profile:
+                activities = [torch.profiler.ProfilerActivity.CPU]
+                if self.device == "cuda":
+                    activities.append(torch.profiler.ProfilerActivity.CUDA)
+                torch_profiler = torch.profiler.profile(activities=activities, record_shapes=True)
+
+            with trace.span("model.generate"), torch_profiler as prof:
+                self.model.generate(
+                    **inputs,
+                    max_new_tokens=None,
+                    cfg_scale=cfg_scale,
+                    tokenizer=self.processor.tokenizer,
+                    generation_config={"do_sample": False},
+                    audio_streamer=audio_streamer,
+                    stop_check_fn=stop_event.is_set,
+                    verbose=False,
+                    refresh_negative=True,
+                    all_prefilled_outputs=all_prefilled_outputs,
+                )
+            if trace.torch_profile:
+                prof.export_chrome_trace(str(trace.torch_trace_path))
+        except Exception as exc:
+            import traceback
+            errors.append(exc)
+            traceback.print_exc()
+            audio_streamer.end()
+        finally:
+            # Only drop the record once the worker is really done with its prefill copy
+            self._generations.pop(generation_id, None)
+
+    def stream(
+        self,
+        text: str,
+        cfg_scale: float = 1.5,
+        voice_key: Optional[str] = None,
+        stop_event: Optional[threading.Event] = None,
+        trace=NULL_TRACE,
+    ) -> Iterator[np.ndarray]:
+        """Generate speech and stream audio chunks."""
+        if not text.strip():
+            return
+
+        text = text.replace("'", "'")
+
+        # Get voice resources
+        key = voice_key if voice_key and voice_key in self.voice_presets else self.default_voice_key
+        prefilled_outputs = self._ensure_voice_cached(key)
+
+        # Prepare inputs
+        with trace.span("prepare_inputs", voice=key):
+            inputs = self._prepare_inputs(text, prefilled_outputs, voice_key=key)
+        audio_streamer = AudioStreamer(batch_size=1, stop_signal=None, timeout=None)
+        errors: list = []
+        stop_signal = stop_event or threading.Event()
+
+        # Hand the generation to a persistent worker thread
+        generation_id = next(self._generation_ids)
+        job = GenerationJob(
+            id=generation_id,
+            run=functools.partial(
+                self._run_generation,
+                inputs=inputs,
+                audio_streamer=audio_streamer,
+                errors=errors,
+                cfg_scale=cfg_scale,
+                prefilled_outputs=prefilled_outputs,
+                stop_event=stop_signal,
+                trace=trace,
+                generation_id=generation_id,
+            ),
+            text=text,
+            voice=key,
+        )
+        self._generations[generation_id] = GenerationRecord(
+            id=generation_id,
+            text=text,
+            voice=key,
+            bytes=self._voice_bytes(key, prefilled_outputs) + self._inputs_nbytes(inputs),
+            stop_event=stop_signal,
+        )
+        self._ensure_workers().submit(job)
+
+        try:
+            stream = audio_streamer.get_stream(0)
+            for audio_chunk in stream:
+                with trace.span("convert_chunk"):
+                    if torch.is_tensor(audio_chunk):
+                        audio_chunk = audio_chunk.detach().cpu().to(torch.float32).numpy()
+                    else:
+                        audio_chunk = np.asarray(audio_chunk, dtype=np.float32)
+
+                    if audio_chunk.ndim > 1:
+                        audio_chunk = audio_chunk.reshape(-1)
+
+                    # Normalize to prevent clipping
+                    peak = np.max(np.abs(audio_chunk)) if audio_chunk.size else 0.0
+                    if peak > 1.0:
+                        audio_chunk = audio_chunk / peak
+
+                yield audio_chunk.astype(np.float32, copy=False)
+        finally:
+            stop_signal.set()
+            audio_streamer.end()
+            if job.cancel():
+                # Stopped before a worker got to it
+                self._generations.pop(generation_id, None)
+            elif not job.done.wait(timeout=self.generation_deadline):
+                # generate() ignored stop_check_fn; the watchdog keeps reporting it
+                print(f"[VibeVoice] Warning: {job.thread.name} did not stop, leaving it to the watchdog")
+            if errors:
+                raise errors[0]
+
+    def start_workers(self, count: int) -> None:
+        """Start ``count`` persistent generation threads (one per concurrent generation)."""
+        if self._workers is None:
+            self._workers = WorkerPool(count, init_thread=self._init_worker_thread)
+            print(f"[VibeVoice] Started {count} generation worker(s)")
+
+    def _ensure_workers(self) -> WorkerPool:
+        if self._workers is None:
+            self.start_workers(1)
+        return self._workers
+
+    def _init_worker_thread(self) -> None:
+        # Grad mode and the current CUDA device are per thread; set them once per worker
+        torch.set_grad_enabled(False)
+        if self.device == "cuda":
+            torch.cuda.set_device(self._torch_device)
+
+    def worker_report(self) -> Optional[Dict[str, Any]]:
+        return self._workers.report() if self._workers is not None else None
+
+    def _voice_bytes(self, key: str, prefilled_outputs: Any) -> int:
+        memo_key = (key, id(prefilled_outputs))
+        size = self._voice_nbytes.get(memo_key)
+        if size is None:
+            size = nbytes(prefilled_outputs)
+            self._voice_nbytes = {
+                k: v for k, v in self._voice_nbytes.items() if k[0] != key
+            } | {memo_key: size}
+        return size
+
+    def device_memory(self) -> Dict[str, int]:
+        if torch is None:
+            return {}
+        if self.device == "cuda" and torch.cuda.is_available():
+            return {
+                "allocated": torch.cuda.memory_allocated(self._torch_device),
+                "reserved": torch.cuda.memory_reserved(self._torch_device),
+            }
+        if self.device == "mps" and hasattr(torch, "mps"):
+            return {"allocated": torch.mps.current_allocated_memory()}
+        return {}
+
+    def memory_report(self) -> Dict[str, Any]:
+        """Bytes held by cached voices, active generations, the process and the device."""
+        voices = {key: self._voice_bytes(key, value) for key, value in self._voice_cache.items()}
+        generations = [record.to_dict() for record in list(self._generations.values())]
+        return {
+            "voices": voices,
+            "voicesBytes": sum(voices.values()),
+            "inputCacheBytes": self._input_cache.bytes,
+            "generations": generations,
+            "generationsBytes": sum(g["bytes"] for g in generations),
+            "stalledGenerations": sum(1 for g in generations if g["stalled"]),
+            "processRss": process_rss_bytes(),
+            "device": self.device_memory(),
+        }
+
+    def start_watchdog(self, deadline: float, interval: float = 5.0) -> None:
+        """Flag generation threads that run past ``deadline`` seconds."""
+        if deadline <= 0 or self._watchdog is not None:
+            return
+        self.generation_deadline = deadline
+
+        def watch():
+            while True:
+                time.sleep(interval)
+                for record in list(self._generations.values()):
+                    if record.stalled or record.age() < deadline:
+                        continue
+                    record.stalled = True
+                    if record.stop_event is not None:
+                        record.stop_event.set()
+                    print(
+                        f"[VibeVoice] Watchdog: generation {record.id} running {record.age():.0f}s "
+                        f"(holding {record.bytes / 1e6:.1f} MB) for {record.text[:40]!r}"
+                    )
+                if self._workers is not None:
+                    for name in self._workers.replace_stalled(deadline):
+                        print(f"[VibeVoice] Watchdog: retired stuck worker {name}, started a replacement")
+
+        self._watchdog = threading.Thread(target=watch, name="generation-watchdog", daemon=True)
+        self._watchdog.start()
@@ -3,44 +3,95 @@
 VibeVoice TTS Server
 
 A FastAPI server that provides text-to-speech using Microsoft's VibeVoice-Realtime-0.5B model.
+The model sits behind the ``TTSEngine`` interface (engine.py); ``--engine synthetic``
+swaps in a deterministic CPU engine for load tests and development without weights.
 
 Endpoints:
-- POST /speak       - Generate speech from text (streams via WebSocket)
-- GET  /status      - Server status
-- WS   /ws/audio    - WebSocket for streaming audio
+- POST /speak       - Generate speech from text (streams via WebSocket, or the
+                      response body as raw PCM16 when "stream": true)
+- POST /prefetch    - Render upcoming lines into the audio cache while the model is idle
+- GET  /status      - Server status, including memory accounting and startup progress
+- GET  /metrics     - Prometheus-style metrics
+- GET  /load        - Compact load report polled by tts_router.py
+- GET  /voices      - Available voice presets
+- POST /voices/reload - Rescan voices/ and hot-swap added, changed or deleted presets
+- GET  /traces      - List recorded profiling traces
+- GET  /traces/{file} - Download a Chrome-trace JSON file
+- WS   /ws/audio    - WebSocket for streaming audio (?rate=48000 to resample, ?room=X for a channel)
+- WS   /ws/speak    - Incremental text input (e.g. LLM tokens), spoken segment by segment
+
+The HTTP port is bound before the model loads; until loading finishes /status
+reports per-phase startup progress and the synthesis endpoints return 503.
 
 Usage:
     python vibevoice_server.py --port 3030
+    python vibevoice_server.py --port 3030 --engine synthetic
+
+Rooms: every listener and every request belongs to one named broadcast
+channel ("main" unless given), so one loaded model can voice several shows.
 
 Environment:
+    VIBEVOICE_ENGINE: vibevoice (default) or synthetic, see synthetic_engine.py for its settings
     VIBEVOICE_MODEL: Model path (default: microsoft/VibeVoice-Realtime-0.5B)
     VIBEVOICE_DEVICE: Device to use (default: cuda)
+    VIBEVOICE_FRAME_MS: Duration of broadcast audio frames in ms (default: 40)
+    VIBEVOICE_VOICE_WATCH_S: Poll interval for voices/ changes in seconds (default: 2, 0 disables)
+    VIBEVOICE_INPUT_CACHE_MB: Memory budget for prepared model inputs (default: 64, 0 disables)
+    VIBEVOICE_PROFILE_SAMPLE: Fraction of requests to trace (default: 0)
+    VIBEVOICE_PROFILE_TORCH: Set to 1 to wrap traced generations in the torch profiler
+    VIBEVOICE_TRACE_DIR: Where Chrome-trace JSON files are written (default: ./traces)
+    VIBEVOICE_GENERATION_DEADLINE_S: Flag generations running longer than this (default: 120)
+    VIBEVOICE_LISTENER_GRACE_S: How long broadcast generation continues with no listeners (default: 3)
+    VIBEVOICE_ROOM_IDLE_S: Forget rooms without listeners or requests for this long (default: 600)
+    VIBEVOICE_MAX_CONCURRENT: Generations that may run at once, e.g. one per voice (default: 2)
+    VIBEVOICE_MAX_BATCH: Max same-voice requests in a row a slot prefers over equally urgent other voices (default: 8)
+    VIBEVOICE_AUDIO_CACHE_DIR: Rendered-audio cache directory, shareable between processes (default: ./audio-cache)
+    VIBEVOICE_AUDIO_CACHE_MB: Size bound for the rendered-audio cache (default: 512, 0 disables)
+    VIBEVOICE_RECORD_DIR: Archive every broadcast utterance as WAV + index.jsonl here (default: unset, off)
+    VIBEVOICE_RECORD_QUEUE: Frames buffered for the recorder before it drops audio (default: 1024)
+    VIBEVOICE_TRIM_SILENCE: Set to 0 to broadcast model output untrimmed (default: 1)
+    VIBEVOICE_TRIM_THRESHOLD_DB: Frames below this energy in dBFS count as silence (default: -45)
+    VIBEVOICE_TRIM_LEAD_MS: Silence kept before the first voiced frame (default: 30)
+    VIBEVOICE_TRIM_TAIL_MS: Silence kept after the last voiced frame (default: 120)
+    VIBEVOICE_TRIM_MAX_PAUSE_MS: Longer pauses inside an utterance are shortened to this (default: 800, 0 keeps them)
+    VIBEVOICE_TIME_STRETCH: Set to 0 to ignore target_ms and never time-stretch (default: 1)
+    VIBEVOICE_STRETCH_MIN_RATE: Slowest tempo used to fill a longer window, cache hits only (default: 0.85)
+    VIBEVOICE_STRETCH_MAX_RATE: Fastest tempo used to fit a shorter window (default: 1.3)
 """
 
 import os
 import io
-import copy
 import asyncio
+import time
 import argparse
 import threading
+import itertools
+import functools
+import json
+import re
+import uuid
 from pathlib import Path
-from typing import Optional, Dict, Any, Iterator
+from typing import Optional, Dict, Any, Generator, Iterator, List
 from queue import Queue, Empty
 
-import torch
 import numpy as np
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response
-from pydantic import BaseModel
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
 import uvicorn
 
-# VibeVoice imports
-from vibevoice.modular.modeling_vibevoice_streaming_inference import (
-    VibeVoiceStreamingForConditionalGenerationInference,
-)
-from vibevoice.processor.vibevoice_streaming_processor import VibeVoiceStreamingProcessor
-from vibevoice.modular.streamer import AudioStreamer
+from audio_cache import AudioCache
+from audio_bridge import AudioBridge, AudioFrame, FrameCoalescer
+from engine import ENGINES, SAMPLE_RATE, TTSEngine, create_engine, pcm16
+from prefetch import PrefetchItem, Prefetcher
+from profiling import NULL_TRACE, Profiler
+from recorder import StreamRecorder
+from resample import ResamplerBank
+from scheduler import VoiceBatchScheduler
+from silence import SilenceTrimmer
+from text_segmenter import ProsodicSegmenter
+from timestretch import DurationFitter
 
 app = FastAPI(title="VibeVoice TTS Server")
 
@@ -53,12 +104,56 @@ app.add_middleware(
 )
 
 # Constants
-SAMPLE_RATE = 24_000
+SUPPORTED_RATES = (16_000, 22_050, 24_000, 32_000, 44_100, 48_000)
+FRAME_MS = int(os.environ.get("VIBEVOICE_FRAME_MS", "40"))
+VOICE_WATCH_S = float(os.environ.get("VIBEVOICE_VOICE_WATCH_S", "2"))
 BASE = Path(__file__).parent
+GENERATION_DEADLINE_S = float(os.environ.get("VIBEVOICE_GENERATION_DEADLINE_S", "120"))
+LISTENER_GRACE_S = float(os.environ.get("VIBEVOICE_LISTENER_GRACE_S", "3"))
+ROOM_IDLE_S = float(os.environ.get("VIBEVOICE_ROOM_IDLE_S", "600"))
+MAX_CONCURRENT = int(os.environ.get("VIBEVOICE_MAX_CONCURRENT", "2"))
+MAX_BATCH = int(os.environ.get("VIBEVOICE_MAX_BATCH", "8"))
+AUDIO_CACHE_DIR = Path(os.environ.get("VIBEVOICE_AUDIO_CACHE_DIR", BASE / "audio-cache"))
+AUDIO_CACHE_MB = float(os.environ.get("VIBEVOICE_AUDIO_CACHE_MB", "512"))
+TRACE_DIR = Path(os.environ.get("VIBEVOICE_TRACE_DIR", BASE / "traces"))
+DEFAULT_ROOM = "main"
+ROOM_PATTERN = r"^[A-Za-z0-9_-]{1,64}$"
+RECORD_DIR = os.environ.get("VIBEVOICE_RECORD_DIR")
+RECORD_QUEUE = int(os.environ.get("VIBEVOICE_RECORD_QUEUE", "1024"))
+TRIM_SILENCE = os.environ.get("VIBEVOICE_TRIM_SILENCE", "1") != "0"
+TRIM_SETTINGS = {
+    "threshold_db": float(os.environ.get("VIBEVOICE_TRIM_THRESHOLD_DB", "-45")),
+    "lead_pad_ms": float(os.environ.get("VIBEVOICE_TRIM_LEAD_MS", "30")),
+    "tail_pad_ms": float(os.environ.get("VIBEVOICE_TRIM_TAIL_MS", "120")),
+    "max_pause_ms": float(os.environ.get("VIBEVOICE_TRIM_MAX_PAUSE_MS", "800")),
+}
+TIME_STRETCH = os.environ.get("VIBEVOICE_TIME_STRETCH", "1") != "0"
+STRETCH_MIN_RATE = float(os.environ.get("VIBEVOICE_STRETCH_MIN_RATE", "0.85"))
+STRETCH_MAX_RATE = float(os.environ.get("VIBEVOICE_STRETCH_MAX_RATE", "1.3"))
 
 
 class SpeakRequest(BaseModel):
     text: str
+    voice: Optional[str] = None  # defaults to the server's default voice
+    cfg_scale: float = Field(1.5, gt=0.0, le=5.0)
+    priority: int = 0  # higher runs first
+    id: Optional[str] = None  # echoed as requestId on broadcast audio messages
+    room: str = Field(DEFAULT_ROOM, pattern=ROOM_PATTERN)  # broadcast channel
+    target_ms: Optional[int] = Field(None, gt=0)  # time-stretch the audio to fit this window
+    profile: bool = False
+    stream: bool = False
+
+
+class PrefetchLine(BaseModel):
+    text: str  # other fields (e.g. a lyric line's startMs) are ignored
+
+
+class PrefetchRequest(BaseModel):
+    lines: List[PrefetchLine]
+    voice: Optional[str] = None
+    cfg_scale: float = Field(1.5, gt=0.0, le=5.0)
+    priority: int = Field(-1, lt=0)  # orders prefetches among themselves; real requests always go first
+    replace: bool = True  # drop lines still waiting from an earlier /prefetch
 
 
 class StatusResponse(BaseModel):
@@ -67,305 +162,791 @@ class StatusResponse(BaseModel):
     model: str
     device: str
     voice: str
+    memory: Optional[Dict[str, Any]] = None
+    queue: Optional[Dict[str, Any]] = None
+    audio_cache: Optional[Dict[str, Any]] = None
+    startup: Optional[Dict[str, Any]] = None
+    silence: Optional[Dict[str, Any]] = None
+    stretch: Optional[Dict[str, Any]] = None
+    prefetch: Optional[Dict[str, Any]] = None
+    recorder: Optional[Dict[str, Any]] = None
+    workers: Optional[Dict[str, Any]] = None
+    rooms: Optional[Dict[str, Any]] = None
 
 
-class StreamingTTSService:
-    """VibeVoice TTS Service with streaming support."""
-
-    def __init__(self, model_path: str, device: str = "cuda", inference_steps: int = 5):
-        self.model_path = model_path
-        self.inference_steps = inference_steps
-        self.sample_rate = SAMPLE_RATE
-
-        self.processor: Optional[VibeVoiceStreamingProcessor] = None
-        self.model: Optional[VibeVoiceStreamingForConditionalGenerationInference] = None
-        self.voice_presets: Dict[str, Path] = {}
-        self.default_voice_key: Optional[str] = None
-        self._voice_cache: Dict[str, Any] = {}
-
-        if device == "mps" and not torch.backends.mps.is_available():
-            print("[VibeVoice] Warning: MPS not available. Falling back to CPU.")
-            device = "cpu"
-        self.device = device
-        self._torch_device = torch.device(device)
-
-    def load(self) -> None:
-        """Load model and voice presets."""
-        print(f"[VibeVoice] Loading processor from {self.model_path}")
-        self.processor = VibeVoiceStreamingProcessor.from_pretrained(self.model_path)
-
-        # Decide dtype & attention based on device
-        if self.device == "mps":
-            load_dtype = torch.float32
-            device_map = None
-            attn_impl = "sdpa"
-        elif self.device == "cuda":
-            load_dtype = torch.bfloat16
-            device_map = "cuda"
-            attn_impl = "sdpa"  # Use SDPA for compatibility (flash_attention_2 requires separate install)
-        else:
-            load_dtype = torch.float32
-            device_map = "cpu"
-            attn_impl = "sdpa"
-
-        print(f"[VibeVoice] Loading model on {device_map}, dtype={load_dtype}, attn={attn_impl}")
-
-        self.model = VibeVoiceStreamingForConditionalGenerationInference.from_pretrained(
-            self.model_path,
-            torch_dtype=load_dtype,
-            device_map=device_map,
-            attn_implementation=attn_impl,
-        )
+# Global service instance
+tts_service: Optional[TTSEngine] = None
+audio_bridge: Optional[AudioBridge] = None
+scheduler: Optional[VoiceBatchScheduler] = None
+audio_cache: Optional[AudioCache] = None
+recorder: Optional[StreamRecorder] = None
+prefetcher: Optional[Prefetcher] = None
+silence_totals = {"requests": 0, "onsetSavedMs": 0.0, "pauseTrimmedMs": 0.0, "trailingTrimmedMs": 0.0}
+stretch_totals = {"requests": 0, "fitted": 0, "stretchedMs": 0.0}
+profiler = Profiler(
+    TRACE_DIR,
+    sample_rate=float(os.environ.get("VIBEVOICE_PROFILE_SAMPLE", "0")),
+    torch_profile=os.environ.get("VIBEVOICE_PROFILE_TORCH") == "1",
+)
 
-        if self.device == "mps":
-            self.model.to("mps")
 
-        self.model.eval()
+class ListenerDemand:
+    """Tracks whether anyone is listening to a room's broadcast.
 
-        # Configure noise scheduler
-        self.model.model.noise_scheduler = self.model.model.noise_scheduler.from_config(
-            self.model.model.noise_scheduler.config,
-            algorithm_type="sde-dpmsolver++",
-            beta_schedule="squaredcos_cap_v2",
-        )
-        self.model.set_ddpm_inference_steps(num_steps=self.inference_steps)
-
-        # Load voice presets
-        self.voice_presets = self._load_voice_presets()
-        self.default_voice_key = self._determine_voice_key(os.environ.get("VOICE_PRESET"))
-        self._ensure_voice_cached(self.default_voice_key)
-
-        print(f"[VibeVoice] Model loaded. Default voice: {self.default_voice_key}")
-
-    def _load_voice_presets(self) -> Dict[str, Path]:
-        """Load voice preset files from voices directory."""
-        voices_dir = BASE / "voices"
-        if not voices_dir.exists():
-            raise RuntimeError(f"Voices directory not found: {voices_dir}")
-
-        presets: Dict[str, Path] = {}
-        for pt_path in voices_dir.glob("*.pt"):
-            presets[pt_path.stem] = pt_path
-
-        if not presets:
-            raise RuntimeError(f"No voice preset (.pt) files found in {voices_dir}")
-
-        print(f"[VibeVoice] Found {len(presets)} voice presets: {list(presets.keys())}")
-        return dict(sorted(presets.items()))
-
-    def _determine_voice_key(self, name: Optional[str]) -> str:
-        """Determine which voice to use."""
-        if name and name in self.voice_presets:
-            return name
-
-        # Try defaults
-        for default in ["en-Carter_man", "en-WHTest_man"]:
-            if default in self.voice_presets:
-                return default
-
-        # Fallback to first available
-        return next(iter(self.voice_presets))
-
-    def _ensure_voice_cached(self, key: str) -> Any:
-        """Load and cache voice preset."""
-        if key not in self.voice_presets:
-            raise RuntimeError(f"Voice preset {key!r} not found")
-
-        if key not in self._voice_cache:
-            preset_path = self.voice_presets[key]
-            print(f"[VibeVoice] Loading voice preset: {key}")
-            prefilled_outputs = torch.load(
-                preset_path,
-                map_location=self._torch_device,
-                weights_only=False,
-            )
-            self._voice_cache[key] = prefilled_outputs
-
-        return self._voice_cache[key]
-
-    def _prepare_inputs(self, text: str, prefilled_outputs: Any):
-        """Prepare model inputs from text and voice preset."""
-        processed = self.processor.process_input_with_cached_prompt(
-            text=text.strip(),
-            cached_prompt=prefilled_outputs,
-            padding=True,
-            return_tensors="pt",
-            return_attention_mask=True,
-        )
+    Generation for broadcast requests stops once there have been no audio
+    clients for ``grace`` seconds, which covers quick reconnects (e.g. OBS
+    restarting) without synthesizing whole lines nobody will hear.
+    """
+
+    def __init__(self, grace: float, clients: Dict[WebSocket, int]):
+        self.grace = grace
+        self.clients = clients
+        self._last_seen = time.monotonic()
+
+    def touch(self) -> None:
+        self._last_seen = time.monotonic()
+
+    def lost(self, since: float) -> bool:
+        """True if no listener has been connected since ``since`` + grace."""
+        if self.clients or self.grace < 0:
+            return False
+        return time.monotonic() - max(self._last_seen, since) > self.grace
+
+
+class Room:
+    """A named broadcast channel: its listeners, resamplers and counters."""
 
+    def __init__(self, name: str):
+        self.name = name
+        self.clients: Dict[WebSocket, int] = {}  # client -> requested sample rate
+        self.resamplers = ResamplerBank(SAMPLE_RATE)
+        self.demand = ListenerDemand(LISTENER_GRACE_S, self.clients)
+        self.requests = 0
+        self.active = 0  # requests queued or speaking
+        self.frames = 0
+        self.bytes = 0
+        self.last_activity = time.time()
+
+    def stats(self) -> Dict[str, Any]:
         return {
-            key: value.to(self._torch_device) if hasattr(value, "to") else value
-            for key, value in processed.items()
+            "listeners": len(self.clients),
+            "rates": sorted(set(self.clients.values())),
+            "requests": self.requests,
+            "frames": self.frames,
+            "bytes": self.bytes,
+            "lastActivity": round(self.last_activity, 3),
         }
 
-    def _run_generation(
-        self,
-        inputs,
-        audio_streamer: AudioStreamer,
-        errors: list,
-        cfg_scale: float,
-        prefilled_outputs,
-        stop_event: threading.Event,
-    ) -> None:
-        """Run generation in background thread."""
-        try:
-            self.model.generate(
-                **inputs,
-                max_new_tokens=None,
-                cfg_scale=cfg_scale,
-                tokenizer=self.processor.tokenizer,
-                generation_config={"do_sample": False},
-                audio_streamer=audio_streamer,
-                stop_check_fn=stop_event.is_set,
-                verbose=False,
-                refresh_negative=True,
-                all_prefilled_outputs=copy.deepcopy(prefilled_outputs),
-            )
-        except Exception as exc:
-            import traceback
-            errors.append(exc)
-            traceback.print_exc()
-            audio_streamer.end()
-
-    def stream(
-        self,
-        text: str,
-        cfg_scale: float = 1.5,
-        voice_key: Optional[str] = None,
-        stop_event: Optional[threading.Event] = None,
-    ) -> Iterator[np.ndarray]:
-        """Generate speech and stream audio chunks."""
-        if not text.strip():
+
+rooms: Dict[str, Room] = {}
+utterance_ids = itertools.count()  # tags each broadcast utterance's frames
+
+
+def get_room(name: Optional[str]) -> Room:
+    name = name or DEFAULT_ROOM
+    room = rooms.get(name)
+    if room is None:
+        prune_rooms()
+        room = rooms[name] = Room(name)
+    return room
+
+
+def prune_rooms() -> None:
+    """Forget rooms with no listeners and no requests for ``ROOM_IDLE_S``, so any room name is cheap."""
+    cutoff = time.time() - ROOM_IDLE_S
+    for name, room in list(rooms.items()):
+        if name != DEFAULT_ROOM and not room.clients and not room.active and room.last_activity < cutoff:
+            del rooms[name]
+
+
+def listener_count() -> int:
+    return sum(len(room.clients) for room in rooms.values())
+
+
+class RtfMeter:
+    """Exponentially weighted real-time factor (generation time / audio time)."""
+
+    def __init__(self, alpha: float = 0.2):
+        self.alpha = alpha
+        self.value: Optional[float] = None
+
+    def update(self, elapsed: float, samples: int, sample_rate: int) -> None:
+        if samples <= 0:
             return
+        rtf = elapsed / (samples / sample_rate)
+        self.value = rtf if self.value is None else self.value + self.alpha * (rtf - self.value)
 
-        text = text.replace("'", "'")
-
-        # Get voice resources
-        key = voice_key if voice_key and voice_key in self.voice_presets else self.default_voice_key
-        prefilled_outputs = self._ensure_voice_cached(key)
-
-        # Prepare inputs
-        inputs = self._prepare_inputs(text, prefilled_outputs)
-        audio_streamer = AudioStreamer(batch_size=1, stop_signal=None, timeout=None)
-        errors: list = []
-        stop_signal = stop_event or threading.Event()
-
-        # Start generation in background
-        thread = threading.Thread(
-            target=self._run_generation,
-            kwargs={
-                "inputs": inputs,
-                "audio_streamer": audio_streamer,
-                "errors": errors,
-                "cfg_scale": cfg_scale,
-                "prefilled_outputs": prefilled_outputs,
-                "stop_event": stop_signal,
-            },
-            daemon=True,
-        )
-        thread.start()
 
-        try:
-            stream = audio_streamer.get_stream(0)
-            for audio_chunk in stream:
-                if torch.is_tensor(audio_chunk):
-                    audio_chunk = audio_chunk.detach().cpu().to(torch.float32).numpy()
-                else:
-                    audio_chunk = np.asarray(audio_chunk, dtype=np.float32)
-
-                if audio_chunk.ndim > 1:
-                    audio_chunk = audio_chunk.reshape(-1)
-
-                # Normalize to prevent clipping
-                peak = np.max(np.abs(audio_chunk)) if audio_chunk.size else 0.0
-                if peak > 1.0:
-                    audio_chunk = audio_chunk / peak
-
-                yield audio_chunk.astype(np.float32, copy=False)
-        finally:
-            stop_signal.set()
-            audio_streamer.end()
-            thread.join()
-            if errors:
-                raise errors[0]
+rtf_meter = RtfMeter()
 
-    def chunk_to_pcm16(self, chunk: np.ndarray) -> bytes:
-        """Convert float32 audio chunk to PCM16 bytes."""
-        chunk = np.clip(chunk, -1.0, 1.0)
-        pcm = (chunk * 32767.0).astype(np.int16)
-        return pcm.tobytes()
 
+class SpeechRate:
+    """Per-voice seconds of (trimmed) audio per character, to predict line durations.
 
-# Global service instance
-tts_service: Optional[StreamingTTSService] = None
-audio_clients: set[WebSocket] = set()
+    The time-stretch stage has to pick a tempo before the model has finished,
+    so it starts from this estimate and corrects as the audio arrives.
+    """
+
+    def __init__(self, default: float = 0.065, alpha: float = 0.2):
+        self.default = default
+        self.alpha = alpha
+        self.per_char: Dict[str, float] = {}
+
+    def estimate(self, voice: str, text: str) -> float:
+        return self.per_char.get(voice, self.default) * max(1, len(text.strip()))
+
+    def update(self, voice: str, text: str, seconds: float) -> None:
+        chars = len(text.strip())
+        if chars < 10 or seconds <= 0:
+            return  # very short lines are dominated by padding
+        value, current = seconds / chars, self.per_char.get(voice)
+        self.per_char[voice] = value if current is None else current + self.alpha * (value - current)
 
 
-async def broadcast_audio(audio_bytes: bytes, is_final: bool = False):
-    """Broadcast audio to all connected WebSocket clients."""
+speech_rate = SpeechRate()
+
+
+async def broadcast_audio(
+    audio_bytes: bytes,
+    is_final: bool = False,
+    request_id: Optional[str] = None,
+    seq: Optional[int] = None,
+    room: Optional[Room] = None,
+    stream: Optional[int] = None,
+):
+    """Broadcast audio to the WebSocket clients of one room.
+
+    Clients that asked for a different sample rate share one resampler per
+    (utterance, rate), so each frame is converted once regardless of how many
+    listen, and concurrent utterances never share filter state.
+    """
     import base64
 
-    if not audio_clients:
+    room = room or get_room(DEFAULT_ROOM)
+    if not room.clients:
+        if is_final:
+            room.resamplers.release(stream)
         return
 
-    audio_b64 = base64.b64encode(audio_bytes).decode("utf-8") if audio_bytes else ""
-    message = {"type": "audio", "audio": audio_b64, "isFinal": is_final}
+    by_rate: Dict[int, list[WebSocket]] = {}
+    for client, rate in room.clients.items():
+        by_rate.setdefault(rate, []).append(client)
 
     disconnected = set()
-    for client in audio_clients:
-        try:
-            await client.send_json(message)
-        except:
-            disconnected.add(client)
+    for rate, clients in by_rate.items():
+        payload = audio_bytes
+        resampler = room.resamplers.get(rate, stream)
+        if resampler is not None:
+            samples = np.frombuffer(audio_bytes, dtype=np.int16).astype(np.float32) / 32768.0
+            converted = resampler.process(samples)
+            if is_final:
+                converted = np.concatenate((converted, resampler.flush()))
+            payload = pcm16(converted) if converted.size else b""
+
+        audio_b64 = base64.b64encode(payload).decode("utf-8") if payload else ""
+        message = {"type": "audio", "audio": audio_b64, "isFinal": is_final, "sampleRate": rate}
+        if request_id is not None:
+            message["requestId"] = request_id
+            message["seq"] = seq
+
+        for client in clients:
+            try:
+                await client.send_json(message)
+            except:
+                disconnected.add(client)
+
+    if is_final:
+        room.resamplers.release(stream)
+    for client in disconnected:
+        room.clients.pop(client, None)
+
+
+async def broadcast_frame(frame: AudioFrame):
+    if recorder is not None:
+        recorder.offer(frame)
+    room = get_room(frame.room)
+    room.frames += 1
+    room.bytes += len(frame.pcm)
+    room.last_activity = time.time()
+    trace = frame.trace
+    with trace.span("fanout", room=room.name, clients=len(room.clients), bytes=len(frame.pcm)):
+        await broadcast_audio(
+            frame.pcm,
+            is_final=frame.is_final,
+            request_id=frame.request_id,
+            seq=frame.seq,
+            room=room,
+            stream=frame.stream,
+        )
+    if trace and frame.is_final:
+        path = await asyncio.get_running_loop().run_in_executor(None, profiler.save, trace)
+        print(f"[VibeVoice] Trace written: {path}")
+
+
+@app.on_event("startup")
+async def start_audio_bridge():
+    global audio_bridge
+    audio_bridge = AudioBridge(broadcast_frame)
+    audio_bridge.start()
+
+
+@app.on_event("startup")
+async def start_scheduler():
+    global scheduler
+    scheduler = VoiceBatchScheduler(
+        slots=MAX_CONCURRENT,
+        max_batch=MAX_BATCH,
+        prepare_voice=lambda voice: tts_service.prepare_voice(voice),
+    )
+    scheduler.start()
+
 
-    audio_clients.difference_update(disconnected)
+@app.on_event("startup")
+async def start_prefetcher():
+    global prefetcher
+    prefetcher = Prefetcher(render_prefetch)
+
+
+@app.on_event("shutdown")
+async def stop_audio_bridge():
+    if prefetcher is not None:
+        prefetcher.cancel()
+    if audio_bridge is not None:
+        await audio_bridge.stop()
+    if scheduler is not None:
+        await scheduler.stop()
+    if audio_cache is not None:
+        audio_cache.close()
+    if recorder is not None:
+        recorder.close()
+
+
+def engine_ready() -> bool:
+    # Not just is_loaded: the workers, watchers and watchdog start after load()
+    # returns, and a request in between would start a one-thread pool for good
+    return tts_service is not None and tts_service.is_loaded and tts_service.startup.finished is not None
+
+
+def not_ready_response() -> Response:
+    if tts_service is not None and tts_service.startup.error:
+        return Response(content=f"Model failed to load: {tts_service.startup.error}", status_code=503)
+    return Response(content="Model not loaded", status_code=503, headers={"Retry-After": "5"})
+
+
+def load_engine() -> None:
+    """Load the engine off the event loop so the port is bound while weights load."""
+    try:
+        tts_service.load()
+        tts_service.start_workers(MAX_CONCURRENT)
+        tts_service.start_voice_watcher(VOICE_WATCH_S)
+        tts_service.start_watchdog(GENERATION_DEADLINE_S)
+    except Exception as exc:
+        tts_service.startup.fail(exc)
+        print(f"[VibeVoice] Startup failed: {exc}")
+        return
+    tts_service.startup.done()
 
 
 @app.get("/status")
 async def status() -> StatusResponse:
+    prune_rooms()
     return StatusResponse(
-        ok=tts_service is not None and tts_service.model is not None,
-        engine="vibevoice",
-        model=os.environ.get("VIBEVOICE_MODEL", "microsoft/VibeVoice-Realtime-0.5B"),
+        ok=engine_ready(),
+        engine=tts_service.name if tts_service else "unknown",
+        model=tts_service.model_name if tts_service else "unknown",
         device=tts_service.device if tts_service else "unknown",
-        voice=tts_service.default_voice_key if tts_service else "unknown",
+        voice=(tts_service.default_voice_key if tts_service else None) or "unknown",
+        memory=tts_service.memory_report() if tts_service else None,
+        queue=scheduler.stats() if scheduler else None,
+        audio_cache=audio_cache.stats() if audio_cache else None,
+        startup=tts_service.startup.snapshot() if tts_service else None,
+        silence=silence_totals if TRIM_SILENCE else None,
+        stretch={**stretch_totals, "secondsPerChar": speech_rate.per_char} if TIME_STRETCH else None,
+        prefetch=prefetch_report(),
+        recorder=recorder.stats() if recorder else None,
+        workers=tts_service.worker_report() if tts_service else None,
+        rooms={name: room.stats() for name, room in rooms.items()},
+    )
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus text exposition of memory and generation gauges."""
+    if not engine_ready():
+        return PlainTextResponse("vibevoice_ready 0\n", status_code=503)
+
+    report = tts_service.memory_report()
+    lines = [
+        "vibevoice_ready 1",
+        f"vibevoice_process_rss_bytes {report['processRss']}",
+        f"vibevoice_voice_cache_bytes {report['voicesBytes']}",
+        f"vibevoice_input_cache_bytes {report['inputCacheBytes']}",
+        f"vibevoice_active_generations {len(report['generations'])}",
+        f"vibevoice_active_generation_bytes {report['generationsBytes']}",
+        f"vibevoice_stalled_generations {report['stalledGenerations']}",
+        f"vibevoice_audio_clients {listener_count()}",
+        f"vibevoice_silence_onset_saved_ms_total {silence_totals['onsetSavedMs']:.0f}",
+        f"vibevoice_silence_trimmed_ms_total {silence_totals['pauseTrimmedMs'] + silence_totals['trailingTrimmedMs']:.0f}",
+        f"vibevoice_stretch_requests_total {stretch_totals['requests']}",
+        f"vibevoice_stretch_fitted_total {stretch_totals['fitted']}",
+    ]
+    prefetch = prefetch_report()
+    if prefetch is not None:
+        lines += [
+            f"vibevoice_prefetch_rendered_total {prefetch['rendered']}",
+            f"vibevoice_prefetch_preempted_total {prefetch['preempted']}",
+            f"vibevoice_prefetch_hits_total {prefetch['hits']}",
+            f"vibevoice_prefetch_evicted_unused_total {prefetch['evictedUnused']}",
+        ]
+    prune_rooms()
+    for name, room in rooms.items():
+        lines.append(f'vibevoice_room_listeners{{room="{name}"}} {len(room.clients)}')
+        lines.append(f'vibevoice_room_requests_total{{room="{name}"}} {room.requests}')
+    for key, size in report["voices"].items():
+        lines.append(f'vibevoice_voice_bytes{{voice="{key}"}} {size}')
+    for kind, size in report["device"].items():
+        lines.append(f'vibevoice_device_memory_bytes{{kind="{kind}"}} {size}')
+    return PlainTextResponse("\n".join(lines) + "\n")
+
+
+@app.get("/load")
+async def load_report():
+    """What a router needs to pick an instance: backlog, speed and warm voices."""
+    ready = engine_ready()
+    queue = scheduler.stats() if scheduler else {"pending": 0, "running": [], "slots": MAX_CONCURRENT}
+    return {
+        "ready": ready,
+        "slots": queue["slots"],
+        "queueDepth": queue["pending"],
+        "activeGenerations": len(queue["running"]),
+        "rtf": rtf_meter.value,
+        "voices": tts_service.list_voices() if ready else [],
+        "warmVoices": tts_service.warm_voices() if ready else [],
+        "listeners": listener_count(),
+    }
+
+
+@app.get("/voices")
+async def voices():
+    if not engine_ready():
+        return not_ready_response()
+    return tts_service.voice_info()
+
+
+@app.post("/voices/reload")
+async def reload_voices():
+    """Rescan voices/ and hot-swap presets without restarting the model."""
+    if not engine_ready():
+        return not_ready_response()
+
+    loop = asyncio.get_event_loop()
+    diff = await loop.run_in_executor(None, tts_service.reload_voices)
+    return {"ok": True, **diff}
+
+
+@app.get("/traces")
+async def list_traces():
+    return {"traces": profiler.list()}
+
+
+@app.get("/traces/{name}")
+async def get_trace(name: str):
+    path = profiler.path_for(name)
+    if path is None:
+        return Response(content="Trace not found", status_code=404)
+    return FileResponse(path, media_type="application/json", filename=path.name)
+
+
+def synthesize(
+    request: SpeakRequest,
+    voice: str,
+    stop_event: threading.Event,
+    trace=NULL_TRACE,
+    cache_key: Optional[str] = None,
+    cached: Optional[tuple] = None,
+    trimmer: Optional[SilenceTrimmer] = None,
+    speculative: bool = False,
+) -> Generator[np.ndarray, None, bool]:
+    """Audio chunks for a request: replayed from the audio cache, or generated, trimmed and cached.
+
+    Cached audio was trimmed before it was stored, so hits skip ``trimmer``.
+    ``speculative`` stores it as a prefetch nobody has used yet and leaves the
+    per-request metrics (RTF, silence totals, speech rate) alone. The generator's
+    return value tells whether the audio was complete (and so cached).
+    """
+    if cached is not None:
+        audio, _ = cached
+        with trace.span("audio_cache_hit", samples=int(audio.size)):
+            pass
+        yield audio
+        return True
+
+    rendered: Optional[list] = [] if cache_key is not None else None
+    interrupted = False
+    started, samples, emitted = time.perf_counter(), 0, 0
+    chunks = tts_service.stream(
+        request.text,
+        cfg_scale=request.cfg_scale,
+        voice_key=voice,
+        stop_event=stop_event,
+        trace=trace,
     )
+    for chunk in chunks:
+        interrupted = interrupted or stop_event.is_set()
+        samples += chunk.size
+        if trimmer is not None:
+            chunk = trimmer.push(chunk)
+            if not chunk.size:
+                continue
+        if rendered is not None:
+            rendered.append(chunk)
+        emitted += chunk.size
+        yield chunk
+    interrupted = interrupted or stop_event.is_set()  # engines may end the stream quietly when stopped
+
+    if not interrupted and not speculative:
+        rtf_meter.update(time.perf_counter() - started, samples, tts_service.sample_rate)
+
+    if trimmer is not None:
+        tail = trimmer.flush()
+        if not speculative:
+            record_trim(trimmer, trace)
+        if tail.size:
+            if rendered is not None:
+                rendered.append(tail)
+            emitted += tail.size
+            yield tail
+
+    if not interrupted and not speculative:
+        speech_rate.update(voice, request.text, emitted / tts_service.sample_rate)
+
+    # Only whole utterances go to disk; writes happen on the cache's own thread
+    if rendered and not interrupted:
+        audio_cache.put_async(cache_key, np.concatenate(rendered), tts_service.sample_rate, speculative)
+    return not interrupted
+
+
+def fit_duration(chunks: Iterator[np.ndarray], fitter: Optional[DurationFitter]) -> Iterator[np.ndarray]:
+    """Time-stretch a request's audio towards its ``target_ms`` (after the cache, which keeps it unstretched)."""
+    if fitter is None:
+        yield from chunks
+        return
+    for chunk in chunks:
+        chunk = fitter.push(chunk)
+        if chunk.size:
+            yield chunk
+    tail = fitter.flush()
+    if tail.size:
+        yield tail
+
+
+def new_fitter(request: SpeakRequest, voice: str, cached: Optional[tuple]) -> Optional[DurationFitter]:
+    if not TIME_STRETCH or request.target_ms is None:
+        return None
+    sample_rate = tts_service.sample_rate
+    # A cache hit knows its exact length; generated audio starts from an estimate
+    natural = cached[0].size / sample_rate if cached is not None else speech_rate.estimate(voice, request.text)
+    return DurationFitter(
+        sample_rate,
+        request.target_ms / 1000.0,
+        natural,
+        exact=cached is not None,
+        min_rate=STRETCH_MIN_RATE,
+        max_rate=STRETCH_MAX_RATE,
+    )
+
+
+def record_stretch(fitter: DurationFitter, trace=NULL_TRACE) -> Dict[str, Any]:
+    stats = fitter.stats()
+    trace.instant("time_stretch", **stats)
+    stretch_totals["requests"] += 1
+    stretch_totals["fitted"] += int(stats["fitted"])
+    stretch_totals["stretchedMs"] += abs(stats["naturalMs"] - stats["outputMs"])
+    return stats
+
+
+def new_trimmer() -> Optional[SilenceTrimmer]:
+    if not TRIM_SILENCE:
+        return None
+    return SilenceTrimmer(tts_service.sample_rate, **TRIM_SETTINGS)
+
+
+def record_trim(trimmer: SilenceTrimmer, trace=NULL_TRACE) -> None:
+    stats = trimmer.stats()
+    trace.instant("silence_trim", **stats)
+    silence_totals["requests"] += 1
+    for key, value in stats.items():
+        silence_totals[key] += value
+
+
+def cache_key_for(request: SpeakRequest, voice: str) -> str:
+    return audio_cache.key_for(
+        request.text,
+        voice,
+        {
+            "cfg_scale": request.cfg_scale,
+            "voiceRevision": tts_service.voice_revision(voice),
+            "trim": TRIM_SETTINGS if TRIM_SILENCE else None,
+        },
+        tts_service.cache_identity(),
+    )
+
+
+async def lookup_cached(request: SpeakRequest, voice: str) -> tuple:
+    """Return ``(cache_key, cached_audio_or_None)`` for a request."""
+    if audio_cache is None:
+        return None, None
+    cache_key = cache_key_for(request, voice)
+    cached = await asyncio.get_running_loop().run_in_executor(None, audio_cache.get, cache_key)
+    return cache_key, cached
+
+
+def broadcast_utterance(
+    request: SpeakRequest,
+    voice: str,
+    stop_event: threading.Event,
+    bridge: AudioBridge,
+    trace=NULL_TRACE,
+    cache_key: Optional[str] = None,
+    cached: Optional[tuple] = None,
+) -> Dict[str, Any]:
+    """Blocking: synthesize one request and push fixed-size frames to the broadcast.
+
+    Returns post-processing stats: "silence" for generated (not cached) audio,
+    "stretch" when the request had a ``target_ms``.
+    """
+    coalescer = FrameCoalescer(tts_service.sample_rate * FRAME_MS // 1000)
+    trimmer = new_trimmer() if cached is None else None
+    fitter = new_fitter(request, voice, cached)
+    demand = get_room(request.room).demand
+    started = time.monotonic()
+    seq = itertools.count()
+    stream = next(utterance_ids)
+
+    def emit(pcm: bytes, is_final: bool = False):
+        bridge.put(AudioFrame(
+            pcm,
+            is_final=is_final,
+            trace=trace,
+            request_id=request.id,
+            seq=next(seq),
+            room=request.room,
+            stream=stream,
+        ))
+
+    try:
+        chunks = synthesize(request, voice, stop_event, trace, cache_key, cached, trimmer)
+        for chunk in fit_duration(chunks, fitter):
+            if demand.lost(started):
+                print(f"[VibeVoice] No audio listeners in room {request.room!r}, stopping generation")
+                stop_event.set()
+                break
+            # Regroup model chunks into fixed frames for the single fan-out task
+            for frame in coalescer.push(chunk):
+                emit(tts_service.chunk_to_pcm16(frame))
+    except Exception as e:
+        print(f"[VibeVoice] Generation error: {e}")
+    finally:
+        tail = coalescer.flush()
+        if tail is not None:
+            emit(tts_service.chunk_to_pcm16(tail))
+        emit(b"", is_final=True)
+    stats: Dict[str, Any] = {}
+    if trimmer is not None:
+        stats["silence"] = trimmer.stats()
+    if fitter is not None:
+        stats["stretch"] = record_stretch(fitter, trace)
+    return stats
+
+
+async def run_broadcast(
+    request: SpeakRequest,
+    voice: str,
+    stop_event: threading.Event,
+    trace=NULL_TRACE,
+    cache_key: Optional[str] = None,
+    cached: Optional[tuple] = None,
+) -> Dict[str, Any]:
+    room = get_room(request.room)
+    room.requests += 1
+    if recorder is not None:
+        if request.id is None:
+            request = request.model_copy(update={"id": uuid.uuid4().hex[:10]})
+        recorder.annotate(request.id, request.text, voice, request.room)
+    job = functools.partial(
+        broadcast_utterance, request, voice, stop_event, audio_bridge, trace, cache_key, cached
+    )
+    room.active += 1
+    try:
+        if cached is not None:
+            # Cache hit: no model time needed, skip the generation queue
+            return await asyncio.get_running_loop().run_in_executor(None, job)
+        # Queue behind higher-priority work; slots stay on one voice where they can
+        return await scheduler.run(voice, request.priority, job, room=request.room)
+    finally:
+        room.active -= 1
+        room.last_activity = time.time()
+
+
+async def render_prefetch(request: SpeakRequest, voice: str, stop_event: threading.Event) -> str:
+    """Render one line into the audio cache as background work; returns a ``Prefetcher`` outcome."""
+    cache_key = cache_key_for(request, voice)
+    if audio_cache.contains(cache_key):
+        return "alreadyCached"
+
+    def job() -> str:
+        # Same trimming as a real request, so the entry is exactly what /speak would cache
+        audio = synthesize(request, voice, stop_event, NULL_TRACE, cache_key, None, new_trimmer(), speculative=True)
+        while True:
+            try:
+                next(audio)
+            except StopIteration as done:
+                return "rendered" if done.value else "preempted"
+
+    return await scheduler.run(voice, request.priority, job, room=request.room, preempt=stop_event.set)
+
+
+def prefetch_report() -> Optional[Dict[str, Any]]:
+    if prefetcher is None or audio_cache is None:
+        return None
+    cache = audio_cache.stats()
+    report = {**prefetcher.stats(), "hits": cache["speculativeHits"], "evictedUnused": cache["speculativeEvictions"]}
+    # Hits count first uses of prefetched entries, including ones rendered by other processes
+    report["hitRate"] = round(report["hits"] / report["rendered"], 3) if report["rendered"] else None
+    return report
+
+
+@app.post("/prefetch")
+async def prefetch(body: PrefetchRequest):
+    """Render upcoming lines into the audio cache while the model has nothing else to do.
+
+    Returns at once; progress and hit rates are in /status under "prefetch".
+    """
+    if not engine_ready():
+        return not_ready_response()
+    if audio_cache is None:
+        return JSONResponse({"ok": False, "error": "Audio cache is disabled"}, status_code=409)
+    if body.voice and body.voice not in tts_service.list_voices():
+        return JSONResponse(
+            {"ok": False, "error": f"Unknown voice {body.voice!r}", "voices": tts_service.list_voices()},
+            status_code=400,
+        )
+    voice = tts_service.resolve_voice(body.voice)
+
+    items = [
+        PrefetchItem(SpeakRequest(text=line.text, voice=body.voice, cfg_scale=body.cfg_scale, priority=body.priority), voice)
+        for line in body.lines
+        if line.text.strip()
+    ]
+    queued = prefetcher.submit(items, replace=body.replace)
+    print(f"[VibeVoice] Prefetching {len(items)} line(s) ({voice}), {queued} queued")
+    return {"ok": True, "accepted": len(items), "queued": queued}
 
 
 @app.post("/speak")
-async def speak(request: SpeakRequest):
+async def speak(request: SpeakRequest, http_request: Request):
     """Generate speech from text and broadcast via WebSocket."""
-    if tts_service is None:
-        return Response(content="Model not loaded", status_code=503)
+    if not engine_ready():
+        return not_ready_response()
 
-    print(f'[VibeVoice] Speaking: "{request.text}"')
+    if request.voice and request.voice not in tts_service.list_voices():
+        return JSONResponse(
+            {"ok": False, "error": f"Unknown voice {request.voice!r}", "voices": tts_service.list_voices()},
+            status_code=400,
+        )
+    voice = tts_service.resolve_voice(request.voice)
+
+    print(f'[VibeVoice] Speaking ({voice}): "{request.text}"')
 
-    loop = asyncio.get_event_loop()
     stop_event = threading.Event()
+    trace = profiler.start(request.text[:60], requested=request.profile)
+    cache_key, cached = await lookup_cached(request, voice)
+
+    if request.stream:
+        return StreamingResponse(
+            stream_pcm(request, voice, stop_event, http_request, trace, cache_key, cached),
+            media_type=f"audio/L16;rate={tts_service.sample_rate};channels=1",
+        )
+
+    post = await run_broadcast(request, voice, stop_event, trace, cache_key, cached)
 
-    def generate_and_stream():
+    result = {"ok": True, "cached": cached is not None, **post}
+    if trace:
+        result["trace"] = f"{trace.id}.json"
+    return result
+
+
+async def stream_pcm(
+    request: SpeakRequest,
+    voice: str,
+    stop_event: threading.Event,
+    http_request: Request,
+    trace=NULL_TRACE,
+    cache_key: Optional[str] = None,
+    cached: Optional[tuple] = None,
+):
+    """Yield PCM16 for one request; stops generation as soon as the client goes away."""
+    loop = asyncio.get_running_loop()
+    chunks: asyncio.Queue = asyncio.Queue()
+
+    def produce():
         try:
-            for chunk in tts_service.stream(request.text, stop_event=stop_event):
-                pcm_bytes = tts_service.chunk_to_pcm16(chunk)
-                # Schedule broadcast on event loop
-                asyncio.run_coroutine_threadsafe(broadcast_audio(pcm_bytes, is_final=False), loop)
+            trimmer = new_trimmer() if cached is None else None
+            fitter = new_fitter(request, voice, cached)
+            audio = synthesize(request, voice, stop_event, trace, cache_key, cached, trimmer)
+            for chunk in fit_duration(audio, fitter):
+                if stop_event.is_set():
+                    break
+                loop.call_soon_threadsafe(chunks.put_nowait, tts_service.chunk_to_pcm16(chunk))
+            if fitter is not None:
+                record_stretch(fitter, trace)
         except Exception as e:
             print(f"[VibeVoice] Generation error: {e}")
         finally:
-            asyncio.run_coroutine_threadsafe(broadcast_audio(b"", is_final=True), loop)
-
-    # Run generation in thread pool
-    await loop.run_in_executor(None, generate_and_stream)
+            loop.call_soon_threadsafe(chunks.put_nowait, None)
 
-    return {"ok": True}
+    if cached is not None:
+        job = loop.run_in_executor(None, produce)
+    else:
+        job = asyncio.ensure_future(scheduler.run(voice, request.priority, produce, room=request.room))
+    try:
+        while True:
+            pcm = await chunks.get()
+            if pcm is None:
+                break
+            if await http_request.is_disconnected():
+                print("[VibeVoice] Streaming client disconnected, stopping generation")
+                break
+            yield pcm
+    finally:
+        # Runs on normal completion, on break, and when the response task is cancelled
+        stop_event.set()
+        if not job.done():
+            job.cancel()
+        if trace:
+            await loop.run_in_executor(None, profiler.save, trace)
 
 
 @app.websocket("/ws/audio")
 async def websocket_audio(websocket: WebSocket):
     """WebSocket endpoint for streaming audio."""
+    try:
+        rate = int(websocket.query_params.get("rate", SAMPLE_RATE))
+    except ValueError:
+        rate = SAMPLE_RATE
+    if rate not in SUPPORTED_RATES:
+        await websocket.close(code=1003, reason=f"Unsupported sample rate: {rate}")
+        return
+    room_name = websocket.query_params.get("room", DEFAULT_ROOM)
+    if not re.match(ROOM_PATTERN, room_name):
+        await websocket.close(code=1008, reason=f"Invalid room name: {room_name!r}")
+        return
+
     await websocket.accept()
-    audio_clients.add(websocket)
-    print("[VibeVoice] Audio client connected")
+    room = get_room(room_name)
+    room.clients[websocket] = rate
+    room.demand.touch()
+    print(f"[VibeVoice] Audio client connected to {room.name!r} ({rate} Hz)")
 
     try:
         while True:
@@ -376,12 +957,131 @@ async def websocket_audio(websocket: WebSocket):
     except WebSocketDisconnect:
         pass
     finally:
-        audio_clients.discard(websocket)
-        print("[VibeVoice] Audio client disconnected")
+        room.clients.pop(websocket, None)
+        room.demand.touch()
+        room.last_activity = time.time()
+        print(f"[VibeVoice] Audio client disconnected from {room.name!r}")
+
+
+@app.websocket("/ws/speak")
+async def websocket_speak(websocket: WebSocket):
+    """Speak text while it is still being written, e.g. an LLM reply token by token.
+
+    Query parameters set the voice, cfg_scale, priority, room and id for the whole
+    session. Client messages:
+      {"type": "text", "text": "..."}  (a bare string works too) - append a fragment
+      {"type": "flush"}                - speak whatever is buffered now
+      {"type": "end"}                  - flush, wait until everything was spoken, close
+      {"type": "cancel"}               - drop buffered text and stop the current segment
+    Fragments are cut at prosodic boundaries (text_segmenter.py) and each
+    segment is synthesized and broadcast on /ws/audio as ``{id}-{index}`` while
+    later text keeps arriving. Replies: "segment" when a segment is queued,
+    "spoken" once its audio was broadcast, "done" after "end", and "error".
+    """
+    await websocket.accept()
+    if not engine_ready():
+        await websocket.send_json({"type": "error", "error": "Model not loaded"})
+        await websocket.close(code=1013)
+        return
+
+    params = websocket.query_params
+    try:
+        template = SpeakRequest(
+            text="",
+            voice=params.get("voice"),
+            cfg_scale=params.get("cfg_scale", 1.5),
+            priority=params.get("priority", 0),
+            id=params.get("id") or uuid.uuid4().hex[:10],
+            room=params.get("room", DEFAULT_ROOM),
+            profile=params.get("profile") == "1",
+        )
+    except ValidationError as exc:
+        await websocket.send_json({"type": "error", "error": str(exc)})
+        await websocket.close(code=1008)
+        return
+    if template.voice and template.voice not in tts_service.list_voices():
+        await websocket.send_json({"type": "error", "error": f"Unknown voice {template.voice!r}"})
+        await websocket.close(code=1008)
+        return
+    voice = tts_service.resolve_voice(template.voice)
+
+    segmenter = ProsodicSegmenter()
+    segments: asyncio.Queue = asyncio.Queue()
+    indexes = itertools.count()
+    current_stop = threading.Event()
+
+    async def enqueue(text: Optional[str]) -> None:
+        if not text:
+            return
+        index = next(indexes)
+        request_id = f"{template.id}-{index}"
+        await websocket.send_json({"type": "segment", "index": index, "requestId": request_id, "text": text})
+        segments.put_nowait((index, template.model_copy(update={"text": text, "id": request_id})))
+
+    async def speak_segments() -> None:
+        # One segment at a time keeps them in order; the next one is picked up
+        # as soon as the previous one finished generating, not playing
+        nonlocal current_stop
+        while True:
+            item = await segments.get()
+            if item is None:
+                return
+            index, request = item
+            print(f'[VibeVoice] Speaking segment {request.id} ({voice}): "{request.text}"')
+            current_stop = threading.Event()
+            trace = profiler.start(request.text[:60], requested=request.profile)
+            cache_key, cached = await lookup_cached(request, voice)
+            post = await run_broadcast(request, voice, current_stop, trace, cache_key, cached)
+            await websocket.send_json({
+                "type": "spoken",
+                "index": index,
+                "requestId": request.id,
+                "cached": cached is not None,
+                "stopped": current_stop.is_set(),
+                "silence": post.get("silence"),
+            })
+
+    speaker = asyncio.create_task(speak_segments())
+    try:
+        while True:
+            raw = await websocket.receive_text()
+            try:
+                message = json.loads(raw)
+            except json.JSONDecodeError:
+                message = raw
+            if not isinstance(message, dict):
+                message = {"type": "text", "text": str(message)}
+
+            kind = message.get("type")
+            if kind == "text":
+                for segment in segmenter.push(str(message.get("text", ""))):
+                    await enqueue(segment)
+            elif kind == "flush":
+                await enqueue(segmenter.flush())
+            elif kind == "end":
+                await enqueue(segmenter.flush())
+                segments.put_nowait(None)
+                await speaker
+                await websocket.send_json({"type": "done", "segments": segmenter.segments})
+                await websocket.close()
+                return
+            elif kind == "cancel":
+                segmenter.flush()
+                while not segments.empty():
+                    segments.get_nowait()
+                current_stop.set()
+            else:
+                await websocket.send_json({"type": "error", "error": f"Unknown message type {kind!r}"})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        current_stop.set()
+        if not speaker.done():
+            speaker.cancel()
 
 
 def main():
-    global tts_service
+    global tts_service, audio_cache, recorder
 
     parser = argparse.ArgumentParser(description="VibeVoice TTS Server")
     parser.add_argument("--port", type=int, default=3030, help="Server port")
@@ -398,11 +1098,24 @@ def main():
         choices=["cuda", "cpu", "mps"],
         help="Device to use",
     )
+    parser.add_argument(
+        "--engine",
+        type=str,
+        default=os.environ.get("VIBEVOICE_ENGINE", "vibevoice"),
+        choices=list(ENGINES),
+        help="Synthesis engine",
+    )
     args = parser.parse_args()
 
-    # Initialize service
-    tts_service = StreamingTTSService(model_path=args.model, device=args.device)
-    tts_service.load()
+    # Initialize service; weights load in the background while the port is already up
+    tts_service = create_engine(args.engine, model_path=args.model, device=args.device)
+    threading.Thread(target=load_engine, name="engine-load", daemon=True).start()
+    if AUDIO_CACHE_MB > 0:
+        audio_cache = AudioCache(AUDIO_CACHE_DIR, int(AUDIO_CACHE_MB * 1024 * 1024))
+        print(f"[VibeVoice] Audio cache at {AUDIO_CACHE_DIR} ({AUDIO_CACHE_MB:.0f} MB)")
+    if RECORD_DIR:
+        recorder = StreamRecorder(Path(RECORD_DIR), tts_service.sample_rate, queue_size=RECORD_QUEUE)
+        print(f"[VibeVoice] Recording broadcast to {recorder.directory}")
 
     # Run server
     print(f"[VibeVoice] HTTP server on http://localhost:{args.port}")
@@ -0,0 +1,158 @@
+"""
+Long-lived generation worker threads.
+
+Starting a thread per utterance costs setup time and loses thread-local
+state (grad mode, CUDA stream/context bindings, allocator caches keyed by
+thread) between lines. ``WorkerPool`` keeps a fixed set of threads that pull
+``GenerationJob``s from one queue, and reports what each of them is doing.
+
+A job that hangs pins its worker. ``replace_stalled`` retires such a worker
+(it exits once the job eventually returns) and starts a fresh one, so a stuck
+generation cannot shrink the pool for good.
+"""
+
+import itertools
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+
+@dataclass
+class GenerationJob:
+    id: int
+    run: Callable[[], None]
+    text: str = ""
+    voice: Optional[str] = None
+    submitted: float = field(default_factory=time.monotonic)
+    done: threading.Event = field(default_factory=threading.Event)
+    thread: Optional[threading.Thread] = None
+    started: bool = False
+    cancelled: bool = False
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def claim(self, thread: threading.Thread) -> bool:
+        """Worker side: take the job unless it was cancelled while queued."""
+        with self._lock:
+            if self.cancelled:
+                return False
+            self.started, self.thread = True, thread
+            return True
+
+    def cancel(self) -> bool:
+        """Caller side: withdraw a job that no worker has started; False if one has."""
+        with self._lock:
+            if self.started:
+                return False
+            self.cancelled = True
+            return True
+
+
+class _Worker:
+    def __init__(self, pool: "WorkerPool", index: int):
+        self.pool = pool
+        self.index = index
+        self.current: Optional[GenerationJob] = None
+        self.busy_since: Optional[float] = None
+        self.idle_since = time.monotonic()
+        self.jobs_done = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self.retired = False
+        self.thread = threading.Thread(target=self._loop, name=f"{pool.name}-{index}", daemon=True)
+
+    def _loop(self) -> None:
+        if self.pool.init_thread is not None:
+            self.pool.init_thread()
+        while not self.retired:
+            job = self.pool._jobs.get()
+            if job is None:
+                return
+            if not job.claim(self.thread):
+                job.done.set()
+                continue
+            self.current, self.busy_since = job, time.monotonic()
+            try:
+                job.run()
+            except Exception as exc:  # run() reports its own errors; keep the worker alive
+                self.failures += 1
+                self.last_error = repr(exc)
+            finally:
+                self.jobs_done += 1
+                self.current, self.busy_since = None, None
+                self.idle_since = time.monotonic()
+                job.done.set()
+
+    def report(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        job = self.current
+        return {
+            "name": self.thread.name,
+            "alive": self.thread.is_alive(),
+            "retired": self.retired,
+            "job": None if job is None else {
+                "id": job.id,
+                "text": job.text[:60],
+                "voice": job.voice,
+                "runningSeconds": round(now - self.busy_since, 2) if self.busy_since else 0.0,
+                "queuedSeconds": round((self.busy_since or now) - job.submitted, 3),
+            },
+            "idleSeconds": None if job is not None else round(now - self.idle_since, 2),
+            "jobsDone": self.jobs_done,
+            "failures": self.failures,
+            "lastError": self.last_error,
+        }
+
+
+class WorkerPool:
+    """Fixed set of generation threads fed from one job queue."""
+
+    def __init__(self, count: int, name: str = "generation", init_thread: Optional[Callable[[], None]] = None):
+        self.name = name
+        self.init_thread = init_thread
+        self._jobs: "queue.Queue[Optional[GenerationJob]]" = queue.Queue()
+        self._indexes = itertools.count()
+        self._workers: List[_Worker] = []
+        self._lock = threading.Lock()
+        for _ in range(max(1, count)):
+            self._spawn()
+
+    def _spawn(self) -> _Worker:
+        worker = _Worker(self, next(self._indexes))
+        with self._lock:
+            self._workers = [w for w in self._workers if w.thread.is_alive() or not w.retired] + [worker]
+        worker.thread.start()
+        return worker
+
+    def submit(self, job: GenerationJob) -> GenerationJob:
+        self._jobs.put(job)
+        return job
+
+    def replace_stalled(self, deadline: float) -> List[str]:
+        """Retire workers busy for longer than ``deadline`` seconds and start replacements."""
+        now = time.monotonic()
+        stalled = [
+            w for w in self._workers
+            if not w.retired and w.busy_since is not None and now - w.busy_since > deadline
+        ]
+        for worker in stalled:
+            worker.retired = True
+            self._spawn()
+        return [w.thread.name for w in stalled]
+
+    def stop(self) -> None:
+        for worker in self._workers:
+            if not worker.retired:
+                self._jobs.put(None)
+
+    def queued(self) -> int:
+        return self._jobs.qsize()
+
+    def report(self) -> Dict[str, Any]:
+        workers = [w.report() for w in self._workers]
+        return {
+            "workers": workers,
+            "busy": sum(1 for w in workers if w["job"] is not None),
+            "queued": self.queued(),
+        }
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+
+"""Benchmark for the Vm.sol generator in scripts/vm.py.
+
+Generates synthetic cheatcodes json shaped like Foundry's (groups, statuses,
+safety, overloads, multi-line docs, `memory ... returns` declarations) at
+several multiples of today's size and times parsing and rendering, so
+super-linear behavior shows up as a growing per-cheatcode cost.
+
+    ./scripts/bench_vm.py                      # scales 1, 10, 50
+    ./scripts/bench_vm.py --scale 1 --scale 100
+    ./scripts/bench_vm.py --write-json /tmp/cheatcodes.json --scale 40
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from vm import Cheatcodes, render_sections  # noqa: E402
+
+BASE_CHEATCODES = 900  # roughly the size of Foundry's cheatcodes.json today
+
+GROUPS = [
+    "evm", "testing", "scripting", "filesystem", "environment", "json", "toml",
+    "cryptography", "string", "utilities", "fork", "snapshot", "storage", "record",
+]
+STATUSES = ["stable"] * 8 + ["deprecated", "experimental", "internal"]
+TYPES = ["uint256", "int256", "address", "bool", "bytes32", "string calldata", "bytes calldata"]
+RETURNS = ["uint256", "address", "bytes memory", "string memory", "bool", "bytes32[] memory"]
+
+
+def synthetic_json(scale: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    n = BASE_CHEATCODES * scale
+    cheatcodes = []
+    for i in range(n):
+        name = f"{rng.choice(['get', 'set', 'parse', 'write', 'expect', 'mock', 'record'])}Thing{i // 3}"
+        params = ", ".join(f"{rng.choice(TYPES)} p{j}" for j in range(rng.randint(0, 4)))
+        mutability = rng.choice(["", "view", "pure"])
+        returns = f" returns ({rng.choice(RETURNS)} out)" if rng.random() < 0.7 else ""
+        declaration = f"function {name}({params}) external{' ' + mutability if mutability else ''}{returns};"
+        selector = rng.randbytes(4)
+        cheatcodes.append({
+            "func": {
+                "id": f"{name}_{i % 3}" if i % 3 else name,
+                "description": "\n".join(f"Line {k} describing `{name}`." for k in range(rng.randint(1, 4))),
+                "declaration": declaration,
+                "visibility": "external",
+                "mutability": mutability,
+                "signature": f"{name}()",
+                "selector": "0x" + selector.hex(),
+                "selectorBytes": list(selector),
+            },
+            "group": rng.choice(GROUPS),
+            "status": rng.choice(STATUSES),
+            "safety": "safe" if rng.random() < 0.8 else "unsafe",
+        })
+    return json.dumps({
+        "errors": [],
+        "events": [
+            {"name": f"Event{i}", "description": f"Event {i}.", "declaration": f"event Event{i}(uint256 a);"}
+            for i in range(2 * scale)
+        ],
+        "enums": [
+            {
+                "name": f"Enum{i}",
+                "description": f"Enum {i}.",
+                "variants": [{"name": f"V{j}", "description": f"Variant {j}."} for j in range(4)],
+            }
+            for i in range(5 * scale)
+        ],
+        "structs": [
+            {
+                "name": f"Struct{i}",
+                "description": f"Struct {i}.",
+                "fields": [{"name": f"f{j}", "ty": rng.choice(RETURNS).split()[0], "description": ""} for j in range(5)],
+            }
+            for i in range(15 * scale)
+        ],
+        "cheatcodes": cheatcodes,
+    })
+
+
+def bench(scale: int, repeat: int):
+    json_str = synthetic_json(scale)
+    n = BASE_CHEATCODES * scale
+
+    def best(f) -> float:
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            f()
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    parse = best(lambda: Cheatcodes.from_json(json_str))
+    total = best(lambda: render_sections(Cheatcodes.from_json(json_str)))
+    size = sum(len(s) for s in render_sections(Cheatcodes.from_json(json_str)).values())
+    print(
+        f"x{scale:<4} {n:>7} cheatcodes  {len(json_str) / 1e6:6.1f} MB json  "
+        f"parse {parse * 1000:8.1f} ms  render {total * 1000:8.1f} ms  "
+        f"{total / n * 1e6:6.1f} us/cheatcode  {size / 1e6:6.1f} MB out"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark scripts/vm.py on synthetic cheatcodes json")
+    parser.add_argument("--scale", type=int, action="append", help="multiple of today's size (repeatable)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per scale, the best is reported")
+    parser.add_argument("--write-json", metavar="PATH", help="write the json of the last scale, for vm.py --from")
+    args = parser.parse_args()
+    scales = args.scale or [1, 10, 50]
+
+    for scale in scales:
+        bench(scale, args.repeat)
+    if args.write_json:
+        Path(args.write_json).write_text(synthetic_json(scales[-1]))
+        print(f"Wrote to {args.write_json}")
+
+
+if __name__ == "__main__":
+    main()
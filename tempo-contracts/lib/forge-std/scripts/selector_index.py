@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+
+"""Sorted selector -> cheatcode index written by scripts/vm.py next to Vm.sol.
+
+Decoding a cheatcode call from a trace only needs its 4-byte selector, but
+the cheatcodes json is megabytes of declarations and docs. The index keeps
+just what decoding needs, in a file that is memory-mapped and binary-searched
+without being parsed:
+
+    header   8s magic, u32 count, u32 offset of the string table
+    records  count x (4s selector, u32 string offset, u16 string length, u8 safety, pad),
+             sorted by selector
+    strings  per record: "id\\0signature\\0group\\0status", utf-8
+
+All integers are little-endian.
+
+    with SelectorIndex("src/Vm.selectors.bin") as index:
+        entry = index.lookup(calldata)  # SelectorEntry(selector, id, signature, group, status, safety) or None
+
+    ./scripts/selector_index.py src/Vm.selectors.bin 0x<selector or calldata> ...
+"""
+
+import argparse
+import mmap
+import os
+import struct
+from typing import Iterator, NamedTuple
+
+MAGIC = b"VMSEL\x00\x01\x00"
+HEADER = struct.Struct("<8sII")
+RECORD = struct.Struct("<4sIHBx")
+SAFETY = ("safe", "unsafe")
+
+
+class SelectorEntry(NamedTuple):
+    selector: str
+    id: str
+    signature: str
+    group: str
+    status: str
+    safety: str
+
+
+def write_index(cheatcodes: list, path: str):
+    """Writes the index for `vm.Cheatcode`s; replaces `path` atomically so open maps stay valid."""
+    rows = sorted(
+        (cc.func.selector_bytes, f"{cc.func.id}\0{cc.func.signature}\0{cc.group}\0{cc.status}".encode(), cc.safety)
+        for cc in cheatcodes
+    )
+    records = []
+    strings = []
+    offset = 0
+    for selector, text, safety in rows:
+        assert len(selector) == 4, f"selector must be 4 bytes: {selector.hex()}"
+        records.append(RECORD.pack(selector, offset, len(text), SAFETY.index(safety)))
+        strings.append(text)
+        offset += len(text)
+
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(records), HEADER.size + RECORD.size * len(records)))
+        f.write(b"".join(records))
+        f.write(b"".join(strings))
+    os.replace(tmp, path)
+
+
+class SelectorIndex:
+    """Read-only view of an index file; lookups binary-search the mapped records."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self._count, self._strings = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self._mm.close()
+            raise ValueError(f"{path} is not a selector index")
+
+    def __enter__(self) -> "SelectorIndex":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._mm.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[SelectorEntry]:
+        for i in range(self._count):
+            yield self._entry(i)
+
+    def lookup(self, selector: bytes | str | int) -> SelectorEntry | None:
+        """Finds a selector given as bytes (calldata works too), a hex string or an int."""
+        key = to_selector(selector)
+        mm = self._mm
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            at = HEADER.size + mid * RECORD.size
+            if mm[at:at + 4] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        at = HEADER.size + lo * RECORD.size
+        if lo < self._count and mm[at:at + 4] == key:
+            return self._entry(lo)
+        return None
+
+    def _entry(self, i: int) -> SelectorEntry:
+        selector, offset, length, safety = RECORD.unpack_from(self._mm, HEADER.size + i * RECORD.size)
+        start = self._strings + offset
+        id, signature, group, status = self._mm[start:start + length].decode().split("\0")
+        return SelectorEntry("0x" + selector.hex(), id, signature, group, status, SAFETY[safety])
+
+
+def to_selector(selector: bytes | str | int) -> bytes:
+    if isinstance(selector, int):
+        return selector.to_bytes(4, "big")
+    if isinstance(selector, str):
+        selector = bytes.fromhex(selector.removeprefix("0x")[:8])
+    if len(selector) < 4:
+        raise ValueError(f"selector must be 4 bytes: {selector.hex()}")
+    return bytes(selector[:4])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Look up cheatcode selectors in an index written by vm.py")
+    parser.add_argument("index", help="path to the index, e.g. src/Vm.selectors.bin")
+    parser.add_argument("selectors", nargs="+", help="selectors or calldata as hex")
+    args = parser.parse_args()
+
+    with SelectorIndex(args.index) as index:
+        for selector in args.selectors:
+            entry = index.lookup(selector)
+            print(f"{selector[:10]}  " + (f"{entry.signature}  ({entry.group}, {entry.safety}, {entry.status})" if entry else "unknown"))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,31 @@
 #!/usr/bin/env python3
 
 import argparse
-import copy
+import hashlib
 import json
 import re
 import subprocess
+import tempfile
 from enum import Enum as PyEnum
 from pathlib import Path
 from typing import Callable
 from urllib import request
+from urllib.error import HTTPError
+
+from selector_index import write_index
 
 VoidFn = Callable[[], None]
 
 CHEATCODES_JSON_URL = "https://raw.githubusercontent.com/foundry-rs/foundry/master/crates/cheatcodes/assets/cheatcodes.json"
 OUT_PATH = "src/Vm.sol"
+MANIFEST_PATH = "src/.Vm.sol.manifest.json"
+SELECTORS_PATH = "src/Vm.selectors.bin"
+
+PRINTER_SETTINGS = dict(
+    spdx_identifier="MIT OR Apache-2.0",
+    solidity_requirement=">=0.6.2 <0.9.0",
+    abicoder_pragma=True,
+)
 
 VM_SAFE_DOC = """\
 /// The `VmSafe` interface does not allow manipulation of the EVM state or other actions that may
@@ -36,38 +48,66 @@ def main():
             dest="path",
             required=False,
             help="path to a json file containing the Vm interface, as generated by Foundry")
+    parser.add_argument(
+            "--cache",
+            action="store_true",
+            help=f"do nothing when the input and generator are unchanged, and only regenerate "
+                 f"and format the sections that changed (state is kept in {MANIFEST_PATH})")
     args = parser.parse_args()
-    json_str = request.urlopen(CHEATCODES_JSON_URL).read().decode("utf-8") if args.path is None else Path(args.path).read_text()
+    if args.cache:
+        generate_cached(args.path)
+        return
+
+    json_str, _ = read_json(args.path)
     contract = Cheatcodes.from_json(json_str)
+    out = "\n\n".join(render_sections(contract).values())
+
+    with open(OUT_PATH, "w") as f:
+        f.write(out)
+
+    forge_fmt([OUT_PATH])
+
+    print(f"Wrote to {OUT_PATH}")
+
+    write_index(contract.cheatcodes, SELECTORS_PATH)
+    print(f"Wrote to {SELECTORS_PATH}")
+
+
+def read_json(path: str | None, etag: str | None = None) -> tuple[str | None, str | None]:
+    """Returns the cheatcodes json and its ETag, or `None` if it still matches `etag`."""
+    if path is not None:
+        return Path(path).read_text(), None
+
+    headers = {"If-None-Match": etag} if etag else {}
+    try:
+        with request.urlopen(request.Request(CHEATCODES_JSON_URL, headers=headers)) as res:
+            return res.read().decode("utf-8"), res.headers.get("ETag")
+    except HTTPError as e:
+        if e.code == 304:
+            return None, etag
+        raise
+
 
-    ccs = contract.cheatcodes
-    ccs = list(filter(lambda cc: cc.status not in ["experimental", "internal"], ccs))
-    ccs.sort(key=lambda cc: cc.func.id)
+def render_sections(contract: "Cheatcodes") -> dict[str, str]:
+    """Renders the unformatted prelude, `VmSafe` and `Vm` sections of Vm.sol, in file order."""
+    ccs = [cc for cc in contract.cheatcodes if cc.status not in ("experimental", "internal")]
 
-    safe = list(filter(lambda cc: cc.safety == "safe", ccs))
-    safe.sort(key=CmpCheatcode)
-    unsafe = list(filter(lambda cc: cc.safety == "unsafe", ccs))
-    unsafe.sort(key=CmpCheatcode)
+    safe = [cc for cc in ccs if cc.safety == "safe"]
+    safe.sort(key=cheatcode_sort_key)
+    unsafe = [cc for cc in ccs if cc.safety == "unsafe"]
+    unsafe.sort(key=cheatcode_sort_key)
     assert len(safe) + len(unsafe) == len(ccs)
 
     prefix_with_group_headers(safe)
     prefix_with_group_headers(unsafe)
 
-    out = ""
+    sections = {}
 
-    out += "// Automatically @generated by scripts/vm.py. Do not modify manually.\n\n"
-
-    pp = CheatcodesPrinter(
-        spdx_identifier="MIT OR Apache-2.0",
-        solidity_requirement=">=0.6.2 <0.9.0",
-        abicoder_pragma=True,
-    )
+    pp = CheatcodesPrinter(**PRINTER_SETTINGS)
     pp.p_prelude()
     pp.prelude = False
-    out += pp.finish()
+    sections["prelude"] = "// Automatically @generated by scripts/vm.py. Do not modify manually.\n\n" + pp.finish()
 
-    out += "\n\n"
-    out += VM_SAFE_DOC
     vm_safe = Cheatcodes(
         # TODO: Custom errors were introduced in 0.8.4
         errors=[],  # contract.errors
@@ -77,10 +117,8 @@ def main():
         cheatcodes=safe,
     )
     pp.p_contract(vm_safe, "VmSafe")
-    out += pp.finish()
+    sections["VmSafe"] = VM_SAFE_DOC + pp.finish()
 
-    out += "\n\n"
-    out += VM_DOC
     vm_unsafe = Cheatcodes(
         errors=[],
         events=[],
@@ -89,65 +127,126 @@ def main():
         cheatcodes=unsafe,
     )
     pp.p_contract(vm_unsafe, "Vm", "VmSafe")
-    out += pp.finish()
+    sections["Vm"] = VM_DOC + pp.finish()
 
     # Compatibility with <0.8.0
     def memory_to_calldata(m: re.Match) -> str:
         return " calldata " + m.group(1)
 
-    out = re.sub(r" memory (.*returns)", memory_to_calldata, out)
-
-    with open(OUT_PATH, "w") as f:
-        f.write(out)
-
-    forge_fmt = ["forge", "fmt", OUT_PATH]
-    res = subprocess.run(forge_fmt)
-    assert res.returncode == 0, f"command failed: {forge_fmt}"
+    return {name: re.sub(r" memory (.*returns)", memory_to_calldata, text) for name, text in sections.items()}
 
-    print(f"Wrote to {OUT_PATH}")
 
+def forge_fmt(paths: list[str]):
+    cmd = ["forge", "fmt", *paths]
+    res = subprocess.run(cmd)
+    assert res.returncode == 0, f"command failed: {cmd}"
 
-class CmpCheatcode:
-    cheatcode: "Cheatcode"
 
-    def __init__(self, cheatcode: "Cheatcode"):
-        self.cheatcode = cheatcode
+def generate_cached(path: str | None):
+    """Like `main`, but skips work whose inputs match the manifest of the previous run.
 
-    def __lt__(self, other: "CmpCheatcode") -> bool:
-        return cmp_cheatcode(self.cheatcode, other.cheatcode) < 0
+    The manifest records a hash of the input json together with the generator
+    (this script and its printer settings), the hash of every unformatted
+    section and the hash of the formatted output. Sections whose unformatted
+    text is unchanged are copied from the current output instead of being
+    formatted again, as long as that output is still the one the manifest
+    describes. The selector index is rewritten whenever the input changed or
+    it is missing.
+    """
+    manifest_path = Path(MANIFEST_PATH)
+    manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+    generator = digest(Path(__file__).read_text(), json.dumps(PRINTER_SETTINGS, sort_keys=True))
 
-    def __eq__(self, other: "CmpCheatcode") -> bool:
-        return cmp_cheatcode(self.cheatcode, other.cheatcode) == 0
+    out_path = Path(OUT_PATH)
+    current = out_path.read_text() if out_path.exists() else None
+    intact = current is not None and digest(current) == manifest.get("output")
+    complete = intact and Path(SELECTORS_PATH).exists()
 
-    def __gt__(self, other: "CmpCheatcode") -> bool:
-        return cmp_cheatcode(self.cheatcode, other.cheatcode) > 0
+    same_generator = manifest.get("generator") == generator
+    json_str, etag = read_json(path, manifest.get("etag") if same_generator and complete else None)
+    if json_str is None:
+        print(f"{OUT_PATH} is up to date (cheatcodes json not modified)")
+        return
 
+    key = digest(generator, json_str)
+    if complete and manifest.get("key") == key:
+        print(f"{OUT_PATH} is up to date")
+        return
 
-def cmp_cheatcode(a: "Cheatcode", b: "Cheatcode") -> int:
-    if a.group != b.group:
-        return -1 if a.group < b.group else 1
-    if a.status != b.status:
-        return -1 if a.status < b.status else 1
-    if a.safety != b.safety:
-        return -1 if a.safety < b.safety else 1
-    if a.func.id != b.func.id:
-        return -1 if a.func.id < b.func.id else 1
-    return 0
+    contract = Cheatcodes.from_json(json_str)
+    write_index(contract.cheatcodes, SELECTORS_PATH)
+    sections = render_sections(contract)
+    hashes = {name: digest(text) for name, text in sections.items()}
+    previous = split_sections(current) if intact else {}
+    formatted = {
+        name: previous[name]
+        for name in sections
+        if name in previous and same_generator and manifest.get("sections", {}).get(name) == hashes[name]
+    }
+    changed = [name for name in sections if name not in formatted]
+    formatted.update(format_sections({name: sections[name] for name in changed}))
+
+    out = "\n\n".join(formatted[name] for name in sections) + "\n"
+    if out != current:
+        out_path.write_text(out)
+    manifest_path.write_text(json.dumps({
+        "generator": generator,
+        "key": key,
+        "etag": etag,
+        "sections": hashes,
+        "output": digest(out),
+    }, indent=2) + "\n")
+
+    print(f"Wrote to {OUT_PATH} (regenerated: {', '.join(changed) or 'none'})")
+
+
+def split_sections(text: str) -> dict[str, str]:
+    """Splits a formatted Vm.sol at the `VmSafe` and `Vm` doc comments; empty if they are missing."""
+    safe_at = text.find(VM_SAFE_DOC.splitlines()[0])
+    vm_at = text.find(VM_DOC.splitlines()[0])
+    if not 0 < safe_at < vm_at:
+        return {}
+    return {
+        "prelude": text[:safe_at].strip(),
+        "VmSafe": text[safe_at:vm_at].strip(),
+        "Vm": text[vm_at:].strip(),
+    }
+
+
+def format_sections(sections: dict[str, str]) -> dict[str, str]:
+    """Runs `forge fmt` once over all given sections; nothing is run if there are none."""
+    if not sections:
+        return {}
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = {name: Path(tmp) / f"{name}.sol" for name in sections}
+        for name, text in sections.items():
+            paths[name].write_text(text)
+        forge_fmt([str(p) for p in paths.values()])
+        return {name: p.read_text().strip() for name, p in paths.items()}
+
+
+def digest(*parts: str) -> str:
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def cheatcode_sort_key(cc: "Cheatcode") -> tuple[str, str, str, str]:
+    return (cc.group, cc.status, cc.safety, cc.func.id)
 
 
 # HACK: A way to add group header comments without having to modify printer code
 def prefix_with_group_headers(cheats: list["Cheatcode"]):
-    s = set()
-    for i, cheat in enumerate(cheats):
-        if cheat.group in s:
-            continue
-
-        s.add(cheat.group)
-
-        c = copy.deepcopy(cheat)
-        c.func.description = ""
-        c.func.declaration = f"// ======== {group(c.group)} ========"
-        cheats.insert(i, c)
+    seen = set()
+    out = []
+    for cheat in cheats:
+        if cheat.group not in seen:
+            seen.add(cheat.group)
+            out.append(cheat.with_func(description="", declaration=f"// ======== {group(cheat.group)} ========"))
+        out.append(cheat)
+    cheats[:] = out
     return cheats
 
 
@@ -179,6 +278,17 @@ class Mutability(PyEnum):
 
 
 class Function:
+    __slots__ = (
+        "id",
+        "description",
+        "declaration",
+        "visibility",
+        "mutability",
+        "signature",
+        "selector",
+        "selector_bytes",
+    )
+
     id: str
     description: str
     declaration: str
@@ -223,6 +333,8 @@ class Function:
 
 
 class Cheatcode:
+    __slots__ = ("func", "group", "status", "safety")
+
     func: Function
     group: str
     status: str
@@ -234,6 +346,13 @@ class Cheatcode:
         self.status = status
         self.safety = safety
 
+    def with_func(self, **changes) -> "Cheatcode":
+        """Returns a copy whose `func` has the given fields replaced."""
+        f = self.func
+        fields = {name: getattr(f, name) for name in Function.__slots__}
+        fields.update(changes)
+        return Cheatcode(Function(**fields), self.group, self.status, self.safety)
+
     @staticmethod
     def from_dict(d: dict) -> "Cheatcode":
         return Cheatcode(
@@ -407,7 +526,7 @@ class ItemOrder:
 
 
 class CheatcodesPrinter:
-    buffer: str
+    _parts: list[str]
 
     prelude: bool
     spdx_identifier: str
@@ -441,7 +560,7 @@ class CheatcodesPrinter:
         self.solidity_requirement = solidity_requirement
         self.abicoder_v2 = abicoder_pragma
         self.block_doc_style = block_doc_style
-        self.buffer = buffer
+        self._parts = [buffer] if buffer else []
         self.indent_level = indent_level
         self.nl_str = nl_str
 
@@ -455,9 +574,13 @@ class CheatcodesPrinter:
 
         self.items_order = items_order
 
+    @property
+    def buffer(self) -> str:
+        return "".join(self._parts)
+
     def finish(self) -> str:
         ret = self.buffer.rstrip()
-        self.buffer = ""
+        self._parts = []
         return ret
 
     def p_contract(self, contract: Cheatcodes, name: str, inherits: str = ""):
@@ -626,14 +749,14 @@ class CheatcodesPrinter:
         f()
 
     def _p_indent(self):
-        for _ in range(self.indent_level):
-            self._p_str(self._indent_str)
+        if self.indent_level:
+            self._parts.append(self._indent_str * self.indent_level)
 
     def _p_nl(self):
         self._p_str(self.nl_str)
 
     def _p_str(self, txt: str):
-        self.buffer += txt
+        self._parts.append(txt)
 
     def _inc_indent(self):
         self.indent_level += 1